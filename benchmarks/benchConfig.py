@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+"""Benchmark the core Config lifecycle on synthetic configs
+
+Each benchmark is run on configs of several sizes, where "depth" is the number
+of nested ConfigField levels and "width" the number of scalar fields per level.
+For every (operation, size) pair the best time per call and the tracemalloc
+peak of a single call are reported; the peak of the "retain" benchmark, which
+keeps RETAIN_COUNT configs alive, measures the memory held per config.
+
+Results may be saved as a JSON baseline with --save and compared against a
+previously saved baseline with --compare; the exit status is 1 if any
+benchmark is slower than the baseline by more than --threshold.
+
+Usage: benchConfig.py [-k PATTERN] [--sizes 1x10,3x10,...] [--save FILE] [--compare FILE]
+"""
+from __future__ import print_function
+from builtins import range
+
+import argparse
+import io
+import json
+import os
+import pickle
+import sys
+import tempfile
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+import lsst.pex.config as pexConfig
+import lsst.pex.config.history
+
+DEFAULT_SIZES = ((1, 10), (3, 10), (3, 50), (6, 20))
+RETAIN_COUNT = 100
+
+
+def makeConfigClass(depth, width):
+    """Make a Config class with 'width' scalar fields per level, a ListField, and
+    (if depth > 1) a ConfigField holding the next level down
+    """
+    fields = {}
+    for i in range(width):
+        dtype, default = ((int, i), (float, 0.5*i), (str, "s%d" % i), (bool, i % 2 == 0))[i % 4]
+        fields["f%d" % i] = pexConfig.Field("field %d" % i, dtype, default=default)
+    fields["values"] = pexConfig.ListField("a list", int, default=list(range(10)))
+    if depth > 1:
+        fields["child"] = pexConfig.ConfigField("child config", makeConfigClass(depth - 1, width))
+    name = "BenchConfig%dx%d" % (depth, width)
+    # Make the class importable by name, so that configs can be pickled
+    fields["__module__"] = __name__
+    globals()[name] = type(name, (pexConfig.Config,), fields)
+    return globals()[name]
+
+
+def iterLevels(config):
+    while config is not None:
+        yield config
+        config = getattr(config, "child", None)
+
+
+def modify(config):
+    """Set every scalar field of every level of config to a new value"""
+    for level in iterLevels(config):
+        for name, field in level._fields.items():
+            if name.startswith("f"):
+                value = level._storage[name]
+                setattr(level, name, not value if field.dtype is bool else value[::-1]
+                        if field.dtype is str else value + 1)
+
+
+def clearHistory(config):
+    """Clear the history of every level of config, so that repeated benchmarks do not grow it"""
+    for level in iterLevels(config):
+        for history in level._history.values():
+            del history[:]
+
+
+def benchConstruct(ConfigClass):
+    return ConfigClass
+
+
+def benchRetain(ConfigClass):
+    return lambda: [ConfigClass() for i in range(RETAIN_COUNT)]
+
+
+def benchSet(ConfigClass):
+    config = ConfigClass()
+
+    def func():
+        modify(config)
+        clearHistory(config)
+    return func
+
+
+def benchUpdate(ConfigClass):
+    config = ConfigClass()
+    kw = dict((name, config._storage[name]) for name in config._fields if name.startswith("f"))
+
+    def func():
+        config.update(**kw)
+        clearHistory(config)
+    return func
+
+
+def _savedStream(ConfigClass):
+    config = ConfigClass()
+    modify(config)
+    stream = io.StringIO()
+    config.saveToStream(stream)
+    return stream.getvalue()
+
+
+def benchLoadFromStream(ConfigClass):
+    text = _savedStream(ConfigClass)
+    return lambda: ConfigClass().loadFromStream(text)
+
+
+def benchLoad(ConfigClass):
+    fd, filename = tempfile.mkstemp(suffix=".py")
+    with os.fdopen(fd, "w") as f:
+        f.write(_savedStream(ConfigClass))
+    benchLoad.cleanup.append(filename)
+    return lambda: ConfigClass().load(filename)
+
+
+benchLoad.cleanup = []
+
+
+def benchSaveToStream(ConfigClass):
+    config = ConfigClass()
+    modify(config)
+    return lambda: config.saveToStream(io.StringIO())
+
+
+def benchPickle(ConfigClass):
+    config = ConfigClass()
+    modify(config)
+    return lambda: pickle.loads(pickle.dumps(config))
+
+
+def benchPickleFrozen(ConfigClass):
+    # the per-task cost of sending the same frozen config to a process pool
+    config = ConfigClass()
+    modify(config)
+    config.freeze()
+    return lambda: pickle.dumps(config)
+
+
+def benchValidate(ConfigClass):
+    return ConfigClass().validate
+
+
+def benchFreeze(ConfigClass):
+    return lambda: ConfigClass().freeze()
+
+
+def benchCompare(ConfigClass):
+    config1 = ConfigClass()
+    config2 = ConfigClass()
+    return lambda: config1.compare(config2, shortcut=False)
+
+
+def benchToDict(ConfigClass):
+    return ConfigClass().toDict
+
+
+def benchHistoryFormat(ConfigClass):
+    config = ConfigClass()
+    modify(config)
+    return lambda: [lsst.pex.config.history.format(level, name)
+                    for level in iterLevels(config) for name in level._fields if name.startswith("f")]
+
+
+BENCHMARKS = (
+    ("construct", benchConstruct),
+    ("retain", benchRetain),
+    ("set", benchSet),
+    ("update", benchUpdate),
+    ("load", benchLoad),
+    ("loadFromStream", benchLoadFromStream),
+    ("saveToStream", benchSaveToStream),
+    ("pickle", benchPickle),
+    ("pickleFrozen", benchPickleFrozen),
+    ("validate", benchValidate),
+    ("freeze", benchFreeze),
+    ("compare", benchCompare),
+    ("toDict", benchToDict),
+    ("historyFormat", benchHistoryFormat),
+)
+
+
+def timeCall(func, minTime=0.2, repeat=3):
+    """Return the best time per call of func, in seconds"""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= minTime/repeat or number >= 1000000:
+            break
+        number *= 10
+    return min([elapsed] + timer.repeat(repeat - 1, number))/number
+
+
+def peakMemory(func):
+    """Return the tracemalloc peak of a single call of func, in bytes (None on Python 2)"""
+    if tracemalloc is None:
+        return None
+    func()  # warm up any caches so they are not counted
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes, pattern=None):
+    """Run the benchmarks, returning a dict of key: {"time": seconds, "peak": bytes}"""
+    results = {}
+    for depth, width in sizes:
+        ConfigClass = makeConfigClass(depth, width)
+        for name, setup in BENCHMARKS:
+            key = "%s[%dx%d]" % (name, depth, width)
+            if pattern is not None and pattern not in key:
+                continue
+            func = setup(ConfigClass)
+            results[key] = {"time": timeCall(func), "peak": peakMemory(func)}
+            report(key, results[key])
+    for filename in benchLoad.cleanup:
+        os.remove(filename)
+    del benchLoad.cleanup[:]
+    return results
+
+
+def report(key, result, baseline=None):
+    peak = "%10.1f KiB" % (result["peak"]/1024.0) if result["peak"] is not None else "%14s" % "n/a"
+    line = "%-28s %12.2f us %s" % (key, 1e6*result["time"], peak)
+    if baseline is not None:
+        line += "   %5.2fx baseline" % (result["time"]/baseline["time"])
+    print(line)
+
+
+def compare(results, baseline, threshold):
+    """Print results relative to baseline; return the keys that regressed by more than threshold"""
+    print("\nComparison with baseline:")
+    regressions = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        report(key, results[key], baseline[key])
+        if results[key]["time"] > threshold*baseline[key]["time"]:
+            regressions.append(key)
+    return regressions
+
+
+def parseSizes(text):
+    return [tuple(int(n) for n in size.split("x")) for size in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose key contains PATTERN")
+    parser.add_argument("--sizes", type=parseSizes, default=DEFAULT_SIZES,
+                        help="comma-separated DEPTHxWIDTH config sizes")
+    parser.add_argument("--save", help="save results as a JSON baseline")
+    parser.add_argument("--compare", help="compare results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio above which a benchmark counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.pattern)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions: %s" % ", ".join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+"""Measure the cost of "import lsst.pex.config" in a fresh interpreter
+
+Each repetition runs a new Python process, so nothing is shared between
+measurements.  The script also reports which optional heavy dependencies
+were imported as a side effect; none should be.
+
+Usage: benchImport.py [-n REPEAT]
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ("numpy", "lsst.pex.policy", "lsst.daf.base")
+
+_SCRIPT = """
+import json, sys, time
+start = time.time()
+import lsst.pex.config
+elapsed = time.time() - start
+print(json.dumps({"elapsed": elapsed, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure():
+    """Import lsst.pex.config in a subprocess; return (seconds, list of heavy modules imported)"""
+    output = subprocess.check_output([sys.executable, "-c", _SCRIPT])
+    result = json.loads(output.decode().strip().splitlines()[-1])
+    return result["elapsed"], result["heavy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--repeat", type=int, default=10, help="number of fresh interpreters")
+    args = parser.parse_args()
+
+    times = []
+    heavy = set()
+    for i in range(args.repeat):
+        elapsed, imported = measure()
+        times.append(elapsed)
+        heavy.update(imported)
+    times.sort()
+    print("import lsst.pex.config: min %.1f ms, median %.1f ms, max %.1f ms over %d runs" %
+          (1e3*times[0], 1e3*times[len(times)//2], 1e3*times[-1], len(times)))
+    print("heavy modules imported: %s" % (", ".join(sorted(heavy)) if heavy else "none"))
+    return 1 if heavy else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,9 +20,13 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 from .config import *
+from .snapshot import *
+from .sharedConfig import *
 from .rangeField import *
 from .choiceField import *
 from .listField import *
+from .arrayField import *
+from .derivedField import *
 from .dictField import *
 from .configField import *
 from .configChoiceField import *
@@ -31,4 +35,6 @@ from .configDictField import *
 from .convert import *
 from .wrap import *
 from .registry import *
+from .instrumentation import *
+from .tracing import *
 from .version import *
@@ -0,0 +1,288 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import str
+from builtins import zip
+
+import math
+
+from .config import Config, Field, FieldValidationError, _joinNamePath, _notifyObservers, _isObserved
+from .comparison import compareScalars, getComparisonName
+from .callStack import getCallStack, getStackFrame
+from . import instrumentation
+
+__all__ = ["ArrayField"]
+
+
+class ArrayField(Field):
+    """
+    Defines a field holding a numpy array of fixed dtype, for large numeric
+    vectors (e.g. coefficients or weights) that would be slow to hold in a
+    ListField
+
+    Values may be set from any sequence or array that can be cast to dtype
+    without loss of kind (e.g. ints to a float field, but not floats to an
+    int field); integers may be set in fields of any integer dtype, signed or
+    not.  Values that do not fit dtype (e.g. 1000 in an int8 field, or 1e300
+    in a float32 field) are rejected rather than wrapped or overflowed.
+
+    The field holds its own read-only copy of the value, which is returned
+    without copying when the field is read and is shared with the field
+    history, so the history holds one reference per change rather than a
+    copy of the items.
+
+    If shape is not None, instances of this field must have that shape, where
+    an entry of None matches any size along that axis.  Otherwise instances
+    must be one-dimensional, and length, minLength and maxLength constrain
+    their length as for ListField.
+
+    min and max, if not None, bound every element (inclusively unless
+    inclusiveMin or inclusiveMax is False).  check, if not None, is called
+    with the whole (read-only) array and must return True or an array of
+    booleans that are all True.  These checks are vectorized; no Python code
+    is run per element.
+
+    A defaultFactory may be given instead of a default, as for Field.
+
+    numpy is only imported when an ArrayField is defined.
+    """
+
+    def __init__(self, doc, dtype, default=None, optional=False, shape=None,
+                 length=None, minLength=None, maxLength=None,
+                 min=None, max=None, inclusiveMin=True, inclusiveMax=True, check=None,
+                 defaultFactory=None):
+        import numpy
+        dtype = numpy.dtype(dtype)
+        if dtype.kind not in "biufc":
+            raise ValueError("Unsupported ArrayField dtype %s" % dtype)
+        if shape is not None:
+            shape = tuple(shape)
+            if length is not None or minLength is not None or maxLength is not None:
+                raise ValueError("'shape' cannot be combined with 'length', 'minLength' or 'maxLength'")
+        if length is not None:
+            if length <= 0:
+                raise ValueError("'length' (%d) must be positive" % length)
+            minLength = None
+            maxLength = None
+        else:
+            if maxLength is not None and maxLength <= 0:
+                raise ValueError("'maxLength' (%d) must be positive" % maxLength)
+            if minLength is not None and maxLength is not None \
+                    and minLength > maxLength:
+                raise ValueError("'maxLength' (%d) must be at least"
+                                 " as large as 'minLength' (%d)" % (maxLength, minLength))
+        if min is not None and max is not None and min > max:
+            raise ValueError("min = %s > %s = max" % (min, max))
+        if check is not None and not hasattr(check, "__call__"):
+            raise ValueError("'check' must be callable")
+
+        source = getStackFrame()
+        self._setup(doc=doc, dtype=dtype.type, default=default, check=check, optional=optional,
+                    source=source, defaultFactory=defaultFactory)
+        self.shape = shape
+        self.length = length
+        self.minLength = minLength
+        self.maxLength = maxLength
+        self.min = min
+        self.max = max
+        self.inclusiveMin = inclusiveMin
+        self.inclusiveMax = inclusiveMax
+
+    def _toArray(self, value):
+        """
+        Return a read-only array of this field's dtype holding a copy of value
+        """
+        import numpy
+        array = numpy.asarray(value)
+        dtype = numpy.dtype(self.dtype)
+        if array.dtype == object or not (numpy.can_cast(array.dtype, dtype, "same_kind") or
+                                         (array.dtype.kind in "biu" and dtype.kind in "iu")):
+            raise TypeError("Value %s of dtype %s cannot be cast to dtype %s" %
+                            (value, array.dtype, dtype))
+        with numpy.errstate(over="ignore", invalid="ignore"):
+            cast = numpy.array(array, dtype=dtype)
+            if dtype.kind in "iu":
+                lost = cast != array
+            else:
+                # precision may be lost, but not range
+                lost = numpy.isinf(cast) & numpy.isfinite(array)
+        if numpy.any(lost):
+            raise ValueError("Value %s does not fit in dtype %s" % (value, dtype))
+        cast.flags.writeable = False
+        return cast
+
+    def _validateValue(self, value, instance=None):
+        """
+        Validate an array returned by _toArray
+        """
+        import numpy
+        if self.shape is not None:
+            if len(value.shape) != len(self.shape) or \
+                    any(n is not None and n != m for n, m in zip(self.shape, value.shape)):
+                raise ValueError("Shape %s does not match required shape %s" % (value.shape, self.shape))
+        else:
+            if value.ndim != 1:
+                raise ValueError("Value must be one-dimensional; got shape %s" % (value.shape,))
+            lenValue = len(value)
+            if self.length is not None and lenValue != self.length:
+                raise ValueError("Required length=%d, actual length=%d" % (self.length, lenValue))
+            if self.minLength is not None and lenValue < self.minLength:
+                raise ValueError("Minimum allowed length=%d, actual length=%d" % (self.minLength, lenValue))
+            if self.maxLength is not None and lenValue > self.maxLength:
+                raise ValueError("Maximum allowed length=%d, actual length=%d" % (self.maxLength, lenValue))
+        # written so that NaN fails both checks
+        if self.min is not None and \
+                not numpy.all(value >= self.min if self.inclusiveMin else value > self.min):
+            raise ValueError("Value has elements below the minimum %s" % (self.min,))
+        if self.max is not None and \
+                not numpy.all(value <= self.max if self.inclusiveMax else value < self.max):
+            raise ValueError("Value has elements above the maximum %s" % (self.max,))
+        if self.check is not None and \
+                not numpy.all(instrumentation.callCheck(self.check, value, self, instance)):
+            raise ValueError("Value %s is not a valid value" % str(value))
+
+    def __set__(self, instance, value, at=None, label="assignment"):
+        if instance._frozen:
+            raise FieldValidationError(self, instance, "Cannot modify a frozen Config")
+
+        history = instance._history.setdefault(self.name, [])
+        if value is not None:
+            try:
+                value = self._toArray(value)
+                if instrumentation.enabled:
+                    instrumentation.callTimed("validateValue", instrumentation.fieldKey(instance, self),
+                                              self._validateValue, value, instance)
+                else:
+                    self._validateValue(value, instance)
+            except BaseException as e:
+                raise FieldValidationError(self, instance, str(e))
+
+        observed = Config._observerCount and _isObserved(instance)
+        if observed:
+            old = instance._storage.get(self.name)
+        instance._storage[self.name] = value
+        if at is None:
+            at = getCallStack()
+        # the array is read-only, so the history can share it
+        history.append((value, at, label))
+        if observed:
+            _notifyObservers(instance, self.name, old, value, label)
+
+    def _valuesEqual(self, value1, value2):
+        import numpy
+        if value1 is None or value2 is None:
+            return value1 is value2
+        if value1.shape != value2.shape:
+            return False
+        equal = value1 == value2
+        if value1.dtype.kind in "fc":
+            equal |= numpy.isnan(value1) & numpy.isnan(value2)
+        return bool(equal.all())
+
+    def save(self, outfile, instance):
+        """
+        Save the array as a (nested) list, so that loading it needs no numpy
+        import in the saved file
+        """
+        value = self.__get__(instance)
+        fullname = _joinNamePath(instance._name, self.name)
+        doc = "# " + str(self.doc).replace("\n", "\n# ")
+        if value is None:
+            outfile.write(u"{}\n{}=None\n\n".format(doc, fullname))
+        elif value.dtype.kind in "fc" and not _isFinite(value):
+            # non-finite numbers need special care
+            outfile.write(u"{}\n{}={}\n\n".format(doc, fullname, _formatNonFinite(value.tolist())))
+        else:
+            outfile.write(u"{}\n{}={!r}\n\n".format(doc, fullname, value.tolist()))
+
+    def toDict(self, instance):
+        value = self.__get__(instance)
+        return value.tolist() if value is not None else None
+
+    def _snapshot(self, instance):
+        value = self.__get__(instance)
+        return _toTuples(value.tolist()) if value is not None else None
+
+    def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
+        """Helper function for Config.compare; used to compare two fields for equality.
+
+        @param[in] instance1  LHS Config instance to compare.
+        @param[in] instance2  RHS Config instance to compare.
+        @param[in] shortcut   If True, return as soon as an inequality is found.
+        @param[in] rtol       Relative tolerance for floating point comparisons.
+        @param[in] atol       Absolute tolerance for floating point comparisons.
+        @param[in] output     If not None, a callable that takes a string, used (possibly repeatedly)
+                              to report inequalities.
+
+        Floating point comparisons are performed by numpy.allclose; refer to that for details.
+        """
+        import numpy
+        a1 = getattr(instance1, self.name)
+        a2 = getattr(instance2, self.name)
+        name = getComparisonName(
+            _joinNamePath(instance1._name, self.name),
+            _joinNamePath(instance2._name, self.name)
+        )
+        if not compareScalars("isnone for %s" % name, a1 is None, a2 is None, output=output):
+            return False
+        if a1 is None and a2 is None:
+            return True
+        if not compareScalars("shape for %s" % name, a1.shape, a2.shape, output=output):
+            return False
+        if a1.dtype.kind in "fc":
+            unequal = ~numpy.isclose(a1, a2, rtol=rtol, atol=atol, equal_nan=True)
+        else:
+            unequal = a1 != a2
+        if not unequal.any():
+            return True
+        if output is not None:
+            index = tuple(numpy.argwhere(unequal)[0])
+            output("Inequality in %s: %d elements differ; first at %s: %r != %r" %
+                   (name, unequal.sum(), index, a1[index], a2[index]))
+        return False
+
+
+def _toTuples(value):
+    """
+    Convert a (nested) list to (nested) tuples
+    """
+    if isinstance(value, list):
+        return tuple(_toTuples(x) for x in value)
+    return value
+
+
+def _formatNonFinite(value):
+    """
+    Format a (nested) list of floats or complex numbers, some of which may
+    be non-finite, as Python code
+    """
+    if isinstance(value, list):
+        return "[" + ", ".join(_formatNonFinite(x) for x in value) + "]"
+    if isinstance(value, complex):
+        return "complex(%s, %s)" % (_formatNonFinite(value.real), _formatNonFinite(value.imag))
+    if math.isinf(value) or math.isnan(value):
+        return "float('%r')" % value
+    return repr(value)
+
+
+def _isFinite(value):
+    import numpy
+    return bool(numpy.isfinite(value).all())
@@ -29,6 +29,8 @@ from builtins import object
 import inspect
 import linecache
 
+from . import instrumentation
+
 
 def getCallerFrame(relative=0):
     """Retrieve the frame for the caller
@@ -172,9 +174,12 @@ def getCallStack(skip=0):
     output : `list` of `StackFrame`
         The call stack.
     """
+    start = instrumentation._now() if instrumentation.enabled else None
     frame = getCallerFrame(skip + 1)
     stack = []
     while frame:
         stack.append(StackFrame.fromFrame(frame))
         frame = frame.f_back
+    if start is not None:
+        instrumentation.record("getCallStack", None, instrumentation._now() - start)
     return list(reversed(stack))
@@ -59,8 +59,8 @@ class ChoiceField(Field):
 
         self.source = getStackFrame()
 
-    def _validateValue(self, value):
-        Field._validateValue(self, value)
+    def _validateValue(self, value, instance=None):
+        Field._validateValue(self, value, instance)
         if value not in self.allowed:
             msg = "Value {} is not allowed.\n" \
                 "\tAllowed values: [{}]".format(value, ", ".join(str(key) for key in self.allowed))
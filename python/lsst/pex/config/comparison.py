@@ -27,8 +27,6 @@ or Field._compare implementation, as they take care of writing messages
 as well as floating-point comparisons and shortcuts.
 """
 
-import numpy
-
 __all__ = ("getComparisonName", "compareScalars", "compareConfigs")
 
 
@@ -56,6 +54,7 @@ def compareScalars(name, v1, v2, output, rtol=1E-8, atol=1E-8, dtype=None):
     if v1 is None or v2 is None:
         result = (v1 == v2)
     elif dtype in (float, complex):
+        import numpy  # deferred, so that importing lsst.pex.config does not import numpy
         result = numpy.allclose(v1, v2, rtol=rtol, atol=atol) or (numpy.isnan(v1) and numpy.isnan(v2))
     else:
         result = (v1 == v2)
@@ -33,9 +33,15 @@ import math
 import copy
 import tempfile
 import shutil
+import threading
+import types
+import warnings
+import weakref
 
 from .comparison import getComparisonName, compareScalars, compareConfigs
-from .callStack import getStackFrame, getCallStack
+from .callStack import getStackFrame, getCallStack, StackFrame
+from .snapshot import getSnapshotClass
+from . import instrumentation
 from future.utils import with_metaclass
 
 __all__ = ("Config", "Field", "FieldValidationError")
@@ -72,6 +78,115 @@ def _autocast(x, dtype):
     return x
 
 
+def _iterDictLeaves(path, value):
+    """
+    Iterate over (dotted path, value) pairs for the leaves of a value that
+    may be a (nested) dict, as returned by Field.toDict; an empty dict is
+    itself a leaf
+    """
+    if isinstance(value, dict) and value:
+        for k, v in value.items():
+            for leaf in _iterDictLeaves("%s.%s" % (path, k), v):
+                yield leaf
+    else:
+        yield path, value
+
+
+def _notifyObservers(config, path, old, new, label):
+    """
+    Deliver a change event to the observers of config and of each of its
+    parents, with path made relative to the observed config
+
+    This should only be called when _isObserved(config) is true.
+    """
+    while True:
+        observers = config._observers
+        if observers:
+            for callback in list(observers):
+                callback(path, old, new, label)
+        parent = config._parent() if config._parent is not None else None
+        if parent is None:
+            return
+        path = config._key + "." + path
+        config = parent
+
+
+def _isObserved(config):
+    """
+    Return whether config or any of its parents has observers, i.e. whether
+    changes to config must be reported to _notifyObservers
+
+    Callers check Config._observerCount first, so that nothing is looked up
+    while no config at all has observers.
+    """
+    while config is not None:
+        if config._observers:
+            return True
+        config = config._parent() if config._parent is not None else None
+    return False
+
+
+# The names given by _namedAsRoot in each thread, as {id(config): name}
+_rootNames = threading.local()
+
+
+class _namedAsRoot(object):
+    """
+    Context manager under which config is named name in the current thread,
+    as the root of its tree would be, e.g. when saving it
+
+    The config is not modified, so other threads still see its own name; the
+    names of its sub-configs follow from it.
+    """
+    __slots__ = ("config", "name", "previous")
+
+    def __init__(self, config, name):
+        self.config = config
+        self.name = name
+
+    def __enter__(self):
+        names = _rootNames.__dict__.setdefault("names", {})
+        key = id(self.config)
+        self.previous = (names[key],) if key in names else ()
+        names[key] = self.name
+        return self.config
+
+    def __exit__(self, *args):
+        names = _rootNames.names
+        key = id(self.config)
+        if self.previous:
+            names[key] = self.previous[0]
+        else:
+            del names[key]
+        return False
+
+
+# (weak reference to config, list of its observers) for each live config with
+# observers, keyed by id of the reference (Configs are not hashable); the
+# callback of each reference removes the config's observers from
+# Config._observerCount when it is deleted without unsubscribing them.
+_observerLists = {}
+
+
+def _forgetObservers(ref):
+    Config._observerCount -= len(_observerLists.pop(id(ref))[1])
+
+
+def _dereference(ref, holder):
+    """
+    Return the object of the weak reference ref, by which holder (a List,
+    Dict, ConfigInstanceDict, SelectionSet or ConfigurableInstance) refers to
+    the object holding it.
+
+    Raises ReferenceError if that object no longer exists, e.g. when holder
+    was taken from a temporary Config.
+    """
+    obj = ref()
+    if obj is None:
+        raise ReferenceError("The Config holding this %s no longer exists" % _typeStr(holder))
+    return obj
+
+
 def _typeStr(x):
     """
     Utility function to generate a fully qualified type name.
@@ -96,35 +211,74 @@ class ConfigMeta(type):
     as a class attribute called '_fields', and adds the name of each field as
     an instance variable of the field itself (so you don't have to pass the
     name of the field to the field constructor).
+
+    Config classes get an empty __slots__ unless they define their own, so
+    that their instances only hold the attributes in Config.__slots__.
     """
+    def __new__(mcs, name, bases, dict_):
+        dict_.setdefault("__slots__", ())
+        return type.__new__(mcs, name, bases, dict_)
+
     def __init__(self, name, bases, dict_):
         type.__init__(self, name, bases, dict_)
         self._fields = {}
         self._source = getStackFrame()
 
-        def getFields(classtype):
-            fields = {}
-            bases = list(classtype.__bases__)
-            bases.reverse()
-            for b in bases:
-                fields.update(getFields(b))
-
-            for k, v in classtype.__dict__.items():
-                if isinstance(v, Field):
-                    fields[k] = v
-            return fields
-
-        fields = getFields(self)
-        for k, v in fields.items():
-            setattr(self, k, copy.deepcopy(v))
+        # Resolve inherited fields in MRO order, reusing the already resolved
+        # '_fields' of Config bases.  Each class gets its own copy of every
+        # inherited field, so that it may be modified (e.g. Sub.field.default = 5)
+        # without affecting other classes.
+        inherited = {}
+        for base in reversed(self.__mro__[1:]):
+            if isinstance(base, ConfigMeta):
+                inherited.update(base._fields)
+            else:
+                for k, v in base.__dict__.items():
+                    if isinstance(v, Field):
+                        inherited[k] = v
+
+        for k, v in inherited.items():
+            if not isinstance(dict_.get(k), Field):
+                setattr(self, k, copy.deepcopy(v))
+
+        # Fields defined in this class only need to be copied if they already
+        # belong to another class or are bound to more than one name.
+        for k, v in list(dict_.items()):
+            if isinstance(v, Field):
+                if getattr(v, "name", None) is not None:
+                    v = copy.deepcopy(v)
+                setattr(self, k, v)
 
     def __setattr__(self, name, value):
         if isinstance(value, Field):
+            if hasattr(value, "rename"):
+                warnings.warn("%s.rename is no longer called: sub-configs of %s.%s should be created with "
+                              "their parent config as '__parent' to follow changes to its name" %
+                              (_typeStr(value), self.__name__, name), DeprecationWarning, stacklevel=2)
             value.name = name
             self._fields[name] = value
+            if "_snapshotClass" in self.__dict__:
+                type.__delattr__(self, "_snapshotClass")
         type.__setattr__(self, name, value)
 
 
+class _FieldDoc(object):
+    """
+    Descriptor for the __doc__ of field value containers (e.g. List, Dict)
+
+    Gives the class its own docstring and each instance the doc of its field,
+    without a copy of the doc in every instance.
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.doc
+        return instance._field.doc
+
+
 class FieldValidationError(ValueError):
     """
     Custom exception class which holds additional information useful to
@@ -163,7 +317,10 @@ class Field(object):
     # code will pass in a future str type on Python 2
     supportedTypes = set((str, unicode, basestring, oldStringType, bool, float, int, complex))
 
-    def __init__(self, doc, dtype, default=None, check=None, optional=False):
+    # Callable computing the default on first access, if any; see _setup
+    defaultFactory = None
+
+    def __init__(self, doc, dtype, default=None, check=None, optional=False, defaultFactory=None):
         """Initialize a Field.
 
         dtype ------ Data type for the field.
@@ -174,6 +331,13 @@ class Field(object):
                      validation can be written as part of Config validate()
                      method; this will be ignored if set to None.
         optional --- When False, Config validate() will fail if value is None
+        defaultFactory -- A callable taking no arguments that returns the
+                     default value, for defaults that are expensive to
+                     compute or copy.  It is called the first time the
+                     field is read from each config (which is then
+                     recorded in the field history), rather than when the
+                     config is constructed.  Cannot be combined with
+                     default.
         """
         if dtype not in self.supportedTypes:
             raise ValueError("Unsupported Field dtype %s" % _typeStr(dtype))
@@ -183,33 +347,31 @@ class Field(object):
             dtype = oldStringType
 
         source = getStackFrame()
-        self._setup(doc=doc, dtype=dtype, default=default, check=check, optional=optional, source=source)
+        self._setup(doc=doc, dtype=dtype, default=default, check=check, optional=optional, source=source,
+                    defaultFactory=defaultFactory)
 
-    def _setup(self, doc, dtype, default, check, optional, source):
+    def _setup(self, doc, dtype, default, check, optional, source, defaultFactory=None):
         """
         Convenience function provided to simplify initialization of derived
         Field types
         """
+        if defaultFactory is not None:
+            if default is not None:
+                raise ValueError("'default' and 'defaultFactory' cannot both be specified")
+            if not hasattr(defaultFactory, "__call__"):
+                raise ValueError("'defaultFactory' must be callable")
+            defaultDoc = "computed by ``%s``" % getattr(defaultFactory, "__name__", defaultFactory)
+        else:
+            defaultDoc = '``{0!r}``'.format(default)
         self.dtype = dtype
         self.doc = doc
-        self.__doc__ = doc+" (`"+dtype.__name__+"`, default "+'``{0!r}``'.format(default)+")"
+        self.__doc__ = doc+" (`"+dtype.__name__+"`, default "+defaultDoc+")"
         self.default = default
+        self.defaultFactory = defaultFactory
         self.check = check
         self.optional = optional
         self.source = source
 
-    def rename(self, instance):
-        """
-        Rename an instance of this field, not the field itself.
-        This is invoked by the owning config object and should not be called
-        directly
-
-        Only useful for fields which hold sub-configs.
-        Fields which hold subconfigs should rename each sub-config with
-        the full field name as generated by _joinNamePath
-        """
-        pass
-
     def validate(self, instance):
         """
         Base validation for any field.
@@ -231,11 +393,11 @@ class Field(object):
         """
         pass
 
-    def _validateValue(self, value):
+    def _validateValue(self, value, instance=None):
         """
         Validate a value that is not None
 
-        This is called from __set__
+        This is called from __set__, with the config being set as instance
         This is not part of the Field API. However, simple derived field types
             may benifit from implementing _validateValue
         """
@@ -246,7 +408,7 @@ class Field(object):
             msg = "Value %s is of incorrect type %s. Expected type %s" % \
                 (value, _typeStr(value), _typeStr(self.dtype))
             raise TypeError(msg)
-        if self.check is not None and not self.check(value):
+        if self.check is not None and not instrumentation.callCheck(self.check, value, self, instance):
             msg = "Value %s is not a valid value" % str(value)
             raise ValueError(msg)
 
@@ -284,6 +446,67 @@ class Field(object):
         """
         return self.__get__(instance)
 
+    def _iterLeaves(self, instance, path):
+        """
+        Iterate over (dotted name, value) pairs for the leaf values of an
+        instance of this field.
+        This is invoked by Config.iterLeaves and should not be called directly
+
+        path ---- the dotted name of this field in the config being traversed
+
+        The default implementation yields the value returned by toDict, with
+        non-empty dicts flattened into one leaf per item. Fields which hold
+        sub-configs should instead yield the leaves of each sub-config, without
+        building the intermediate dicts, and an empty dict for an empty
+        container.
+        """
+        return _iterDictLeaves(path, self.toDict(instance))
+
+    def _snapshot(self, instance):
+        """
+        Return an immutable, hashable equivalent of the value of an instance
+        of this field.
+        This is invoked by Config.snapshot and should not be called directly
+
+        Simple values are passed through. Fields holding containers or
+        sub-configs must return immutable copies, e.g. tuples, FrozenDicts or
+        the snapshots of the sub-configs.
+        """
+        return self.__get__(instance)
+
+    def _resetToDefault(self, instance, at, label):
+        """
+        Set the value of an instance of this field to its default, as if the
+        instance had just been constructed.
+        This is invoked by Config._resetToDefaults and should not be called directly
+
+        Fields whose values hold more state than __set__ replaces (such as the
+        unselected sub-configs of a ConfigChoiceField, or the target of a
+        ConfigurableField) must override this to reset that state as well.
+        """
+        default = self.defaultFactory() if self.defaultFactory is not None else self.default
+        self.__set__(instance, default, at=at, label=label)
+
+    # Types of Field attributes that cannot be modified in place, which
+    # copies of the Field may share
+    _immutableTypes = (oldStringType, unicode, bytes, bool, int, long, float, complex, type(None), type,
+                       types.FunctionType, StackFrame)
+
+    def __deepcopy__(self, memo):
+        """
+        Customize deep-copying, as every Config subclass copies the fields it
+        inherits: attributes that cannot be modified in place (the doc, dtype,
+        check, source and most defaults) are shared with the copy, and only
+        the others (e.g. a list default) are deep-copied.
+        """
+        other = type(self).__new__(type(self))
+        memo[id(self)] = other
+        for k, v in self.__dict__.items():
+            if not isinstance(v, self._immutableTypes):
+                v = copy.deepcopy(v, memo)
+            other.__dict__[k] = v
+        return other
+
     def __get__(self, instance, owner=None, at=None, label="default"):
         """
         Define how attribute access should occur on the Config instance
@@ -301,7 +524,23 @@ class Field(object):
         if instance is None or not isinstance(instance, Config):
             return self
         else:
-            return instance._storage[self.name]
+            try:
+                return instance._storage[self.name]
+            except KeyError:
+                if self.defaultFactory is None:
+                    raise
+                return self._setDefaultFromFactory(instance)
+
+    def _setDefaultFromFactory(self, instance):
+        """
+        Compute, validate and store the default of a field with a
+        defaultFactory, recording the access that triggered it in the field
+        history.
+        This is invoked by __get__ the first time the field is read from a
+        config, and should not be called directly
+        """
+        self.__set__(instance, self.defaultFactory(), at=getCallStack(1) + [self.source], label="default")
+        return instance._storage[self.name]
 
     def __set__(self, instance, value, at=None, label='assignment'):
         """
@@ -332,14 +571,23 @@ class Field(object):
         if value is not None:
             value = _autocast(value, self.dtype)
             try:
-                self._validateValue(value)
+                if instrumentation.enabled:
+                    instrumentation.callTimed("validateValue", instrumentation.fieldKey(instance, self),
+                                              self._validateValue, value, instance)
+                else:
+                    self._validateValue(value, instance)
             except BaseException as e:
                 raise FieldValidationError(self, instance, str(e))
 
+        observed = Config._observerCount and _isObserved(instance)
+        if observed:
+            old = instance._storage.get(self.name)
         instance._storage[self.name] = value
         if at is None:
             at = getCallStack()
         history.append((value, at, label))
+        if observed:
+            _notifyObservers(instance, self.name, old, value, label)
 
     def __delete__(self, instance, at=None, label='deletion'):
         """
@@ -351,6 +599,19 @@ class Field(object):
             at = getCallStack()
         self.__set__(instance, None, at=at, label=label)
 
+    def _valuesEqual(self, value1, value2):
+        """
+        Return whether two values of this field are equal, treating NaN as
+        equal to NaN.
+        This is invoked by Config.__eq__ and should not be called directly
+
+        Fields whose values do not compare with == to a single bool (such
+        as numpy arrays) must override this.
+        """
+        if isinstance(value1, float) and math.isnan(value1):
+            return isinstance(value2, float) and math.isnan(value2)
+        return value1 == value2
+
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Helper function for Config.compare; used to compare two fields for equality.
 
@@ -410,6 +671,7 @@ class RecordingImporter(object):
         We return None because we don't do any importing.
         """
         self._modules.add(fullname)
+        instrumentation.instant("import", module=fullname)
         return None
 
     def getModules(self):
@@ -428,6 +690,15 @@ class Config(with_metaclass(ConfigMeta, object)):
     Config also emulates a dict of field name: field value
     """
 
+    # Config instances have no __dict__; these are the only instance attributes
+    # (besides the values held by descriptors of derived classes).
+    __slots__ = ("_frozen", "_key", "_nameCache", "_storage", "_history", "_imports", "_parent",
+                 "_observers", "_derived", "_saved", "__weakref__")
+
+    # Number of callbacks registered with subscribe() on any Config; mutations
+    # only look for observers when this is not zero.
+    _observerCount = 0
+
     def __iter__(self):
         """!Iterate over fields
         """
@@ -436,39 +707,51 @@ class Config(with_metaclass(ConfigMeta, object)):
     def keys(self):
         """!Return the list of field names
         """
-        return list(self._storage.keys())
+        return list(self._fullStorage().keys())
 
     def values(self):
         """!Return the list of field values
         """
-        return list(self._storage.values())
+        return list(self._fullStorage().values())
 
     def items(self):
         """!Return the list of (field name, field value) pairs
         """
-        return list(self._storage.items())
+        return list(self._fullStorage().items())
 
     def iteritems(self):
         """!Iterate over (field name, field value) pairs
         """
-        return iter(self._storage.items())
+        return iter(self._fullStorage().items())
 
     def itervalues(self):
         """!Iterate over field values
         """
-        return iter(self.storage.values())
+        return iter(self._fullStorage().values())
 
     def iterkeys(self):
         """!Iterate over field names
         """
-        return iter(self.storage.keys())
+        return iter(self._fullStorage().keys())
 
     def __contains__(self, name):
         """!Return True if the specified field exists in this config
 
         @param[in] name  field name to test for
         """
-        return self._storage.__contains__(name)
+        return name in self._fields
+
+    def _fullStorage(self):
+        """!Return the dict of field values, first computing any defaults given by a
+        defaultFactory that have not been read yet
+
+        Use this rather than _storage when all values are needed, e.g. to copy them.
+        """
+        if len(self._storage) < len(self._fields):
+            for name in self._fields:
+                if name not in self._storage:
+                    getattr(self, name)
+        return self._storage
 
     def __new__(cls, *args, **kw):
         """!Allocate a new Config object.
@@ -480,26 +763,63 @@ class Config(with_metaclass(ConfigMeta, object)):
         This ensures that even if a derived Config class implements __init__,
         the author does not need to be concerned about when or even if he
         should call the base Config.__init__
+
+        The special '__name' and '__parent' keyword arguments give the name of a
+        sub-config relative to its parent (e.g. "field" or "field['key']") and the
+        parent; a root config may be given a name with no parent.  The full name
+        (e.g. "parent.field") is also accepted with a parent.  Sub-configs must be
+        given their parent to follow changes to its name: Field.rename hooks are
+        no longer called.
         """
         name = kw.pop("__name", None)
-        at = kw.pop("__at", getCallStack())
+        parent = kw.pop("__parent", None)
+        at = kw.pop("__at", None)
+        if at is None:
+            at = getCallStack()
         # remove __label and ignore it
         kw.pop("__label", "default")
 
+        if parent is not None:
+            parentName = parent._name
+            # Field types written when sub-configs were named by their full name may still pass it
+            if parentName and name.startswith(parentName + "."):
+                name = name[len(parentName) + 1:]
+            fullName = _joinNamePath(parentName, name)
+        else:
+            fullName = name
+
         instance = object.__new__(cls)
         instance._frozen = False
-        instance._name = name
+        # until linked to its parent, the config is named by its full name
+        instance._key = fullName
+        instance._nameCache = None
         instance._storage = {}
         instance._history = {}
-        instance._imports = set()
+        # the set of modules imported by loaded override files, if any
+        instance._imports = None
+        instance._parent = None
+        instance._observers = None
+        instance._derived = None
+        # the saved script of a frozen config, kept by _getSaved
+        instance._saved = None
         # load up defaults
         for field in instance._fields.values():
-            instance._history[field.name] = []
-            field.__set__(instance, field.default, at=at + [field.source], label="default")
+            # defaults given by a defaultFactory are set when first read
+            if field.defaultFactory is None:
+                field.__set__(instance, field.default, at=at + [field.source], label="default")
+            else:
+                instance._history[field.name] = []
         # set custom default-overides
-        instance.setDefaults()
+        with instrumentation.timer("setDefaults", instance):
+            instance.setDefaults()
         # set constructor overides
         instance.update(__at=at, **kw)
+        # link to the parent only now, so that setting the initial values is
+        # not reported to the parent's observers
+        if parent is not None:
+            instance._key = name
+            instance._nameCache = None
+            instance._parent = weakref.ref(parent)
         return instance
 
     def __reduce__(self):
@@ -508,10 +828,23 @@ class Config(with_metaclass(ConfigMeta, object)):
         We need to condense and reconstitute the Config, since it may contain lambdas
         (as the 'check' elements) that cannot be pickled.
         """
+        return (unreduceConfig, (self.__class__, self._getSaved()))
+
+    def _getSaved(self):
+        """Return the script written by saveToStream, encoded as bytes
+
+        The script of a frozen config cannot change, so it is made once and
+        kept, making repeated pickling of a frozen config cheap.
+        """
+        if self._saved is not None:
+            return self._saved
         # The stream must be in characters to match the API but pickle requires bytes
         stream = io.StringIO()
         self.saveToStream(stream)
-        return (unreduceConfig, (self.__class__, stream.getvalue().encode()))
+        saved = stream.getvalue().encode()
+        if self._frozen:
+            object.__setattr__(self, "_saved", saved)
+        return saved
 
     def setDefaults(self):
         """
@@ -530,7 +863,9 @@ class Config(with_metaclass(ConfigMeta, object)):
         history tracebacks of the config. Modifying these keywords allows users
         to lie about a Config's history. Please do not do so!
         """
-        at = kw.pop("__at", getCallStack())
+        at = kw.pop("__at", None)
+        if at is None:
+            at = getCallStack()
         label = kw.pop("__label", "update")
 
         for name, value in kw.items():
@@ -540,6 +875,26 @@ class Config(with_metaclass(ConfigMeta, object)):
             except KeyError:
                 raise KeyError("No field of name %s exists in config type %s" % (name, _typeStr(self)))
 
+    def _resetToDefaults(self, at, label):
+        """!Set all fields to their defaults in place, as if this Config had just been constructed
+
+        @param[in] at  call stack to record in the field histories
+        @param[in] label  label to record in the field histories
+
+        This is used when a Config class is assigned to a field that already holds a
+        config, in place of constructing a temporary config and copying all of its
+        values.  It is equivalent except for configs that override __init__, for which
+        the temporary config is still constructed.
+        """
+        cls = type(self)
+        if cls.__init__ is not Config.__init__:
+            self.update(__at=at, __label=label, **cls()._fullStorage())
+            return
+        for field in self._fields.values():
+            field._resetToDefault(self, at, label)
+        with instrumentation.timer("setDefaults", self):
+            self.setDefaults()
+
     def load(self, filename, root="config"):
         """!Modify this config in place by executing the Python code in the named file.
 
@@ -572,26 +927,31 @@ class Config(with_metaclass(ConfigMeta, object)):
         root="root" instead of root="config" will be loaded with a warning printed to sys.stderr.
         This feature will be removed at some point.
         """
-        with RecordingImporter() as importer:
+        if filename is None:
+            # try to determine the file name; a compiled string has attribute "co_filename",
+            # an open file has attribute "name", else give up
+            filename = getattr(stream, "co_filename", None)
+            if filename is None:
+                filename = getattr(stream, "name", None)
+        with RecordingImporter() as importer, \
+                instrumentation.timer("loadFromStream", self, filename=filename):
             try:
                 local = {root: self}
                 exec(stream, {}, local)
             except NameError as e:
                 if root == "config" and "root" in e.args[0]:
-                    if filename is None:
-                        # try to determine the file name; a compiled string has attribute "co_filename",
-                        # an open file has attribute "name", else give up
-                        filename = getattr(stream, "co_filename", None)
-                        if filename is None:
-                            filename = getattr(stream, "name", "?")
-                    sys.stderr.write(u"Config override file %r" % (filename,) +
+                    sys.stderr.write(u"Config override file %r" % (filename or "?",) +
                                      u" appears to use 'root' instead of 'config'; trying with 'root'")
                     local = {"root": self}
                     exec(stream, {}, local)
                 else:
                     raise
 
-        self._imports.update(importer.getModules())
+        modules = importer.getModules()
+        if modules:
+            if self._imports is None:
+                self._imports = set()
+            self._imports.update(modules)
 
     def save(self, filename, root="config"):
         """!Save a python script to the named file, which, when loaded, reproduces this Config
@@ -619,23 +979,19 @@ class Config(with_metaclass(ConfigMeta, object)):
         @param outfile [inout] open file object to which to write the config. Accepts strings not bytes.
         @param root [in] name to use for the root config variable; the same value must be used when loading
         """
-        tmp = self._name
-        self._rename(root)
-        try:
+        with instrumentation.timer("saveToStream", self), _namedAsRoot(self, root):
             configType = type(self)
             typeString = _typeStr(configType)
             outfile.write(u"import {}\n".format(configType.__module__))
             outfile.write(u"assert type({})=={}, 'config is of type %s.%s ".format(root, typeString))
-            outfile.write(u"instead of {}' % (type({}).__module__, type({}).__name__)\n".format(typeString,
-                                                                                                root,
-                                                                                                root))
+            outfile.write(u"instead of {}' % (type({}).__module__, type({}).__name__)\n".format(
+                typeString, root, root))
             self._save(outfile)
-        finally:
-            self._rename(tmp)
 
     def freeze(self):
         """!Make this Config and all sub-configs read-only
         """
+        self._fullStorage()
         self._frozen = True
         for field in self._fields.values():
             field.freeze(self)
@@ -643,7 +999,7 @@ class Config(with_metaclass(ConfigMeta, object)):
     def _save(self, outfile):
         """!Save this Config to an open stream object
         """
-        for imp in self._imports:
+        for imp in self._imports or ():
             if imp in sys.modules and sys.modules[imp] is not None:
                 outfile.write(u"import {}\n".format(imp))
         for field in self._fields.values():
@@ -660,17 +1016,71 @@ class Config(with_metaclass(ConfigMeta, object)):
             dict_[name] = field.toDict(self)
         return dict_
 
-    def _rename(self, name):
-        """!Rename this Config object in its parent config
+    def snapshot(self):
+        """!Return an immutable, hashable copy of the values of this Config and its sub-configs
+
+        The snapshot is an instance of a namedtuple class made for each Config class, with one
+        attribute per field, so reading a value costs no more than reading a plain attribute.
+        Lists and arrays become tuples, dicts become FrozenDicts, sub-configs become their own
+        snapshots and the configs of a ConfigChoiceField or RegistryField become a ChoiceSnapshot
+        (a FrozenDict with the selection as its name, names and active attributes). A
+        ConfigurableField becomes the snapshot of its config.
 
-        @param[in] name  new name for this config in its parent config
+        A snapshot does not follow later changes to this Config; being immutable, it may be shared
+        freely between threads. DerivedField values are not included.
 
-        Correct behavior is dependent on proper implementation of Field.rename. If implementing a new
-        Field type, you may need to implement your own rename method.
+        Correct behavior is dependent on proper implementation of Field._snapshot. If implementing a
+        new Field type, you may need to implement your own _snapshot method.
         """
-        self._name = name
-        for field in self._fields.values():
-            field.rename(self)
+        cls = getSnapshotClass(type(self))
+        fields = self._fields
+        return cls._make(fields[name]._snapshot(self) for name in cls._fields)
+
+    def iterLeaves(self, prefix=None):
+        """!Iterate over (dotted name, value) pairs for all leaf values in this Config
+
+        @param[in] prefix  name to prepend (with a '.') to all names, or None
+
+        The names and values are those of the leaves of the nested dict returned by toDict, but
+        they are generated in a single traversal, without building the dict. Values may be None,
+        or an empty dict for a sub-config or container with nothing in it.
+
+        Correct behavior is dependent on proper implementation of Field._iterLeaves. If implementing a
+        new Field type, you may need to implement your own _iterLeaves method.
+        """
+        if not self._fields and prefix is not None:
+            yield prefix, {}
+        for name, field in self._fields.items():
+            for leaf in field._iterLeaves(self, _joinNamePath(prefix, name)):
+                yield leaf
+
+    def _getName(self):
+        """!Return the full name of this Config: the path to it from the root of its tree
+
+        The name is derived from the names of the parents, so it follows any change to them
+        (e.g. when a parent is saved under a different root name) without updating the sub-configs.
+        A root config has the name it was given, which is usually None.
+        """
+        names = getattr(_rootNames, "names", None)
+        if names:
+            # names given by _namedAsRoot in this thread are not cached
+            if id(self) in names:
+                return names[id(self)]
+            parent = self._parent() if self._parent is not None else None
+            return self._key if parent is None else _joinNamePath(parent._name, self._key)
+        if self._parent is None:
+            return self._key
+        name = self._nameCache
+        if name is not None:
+            return name
+        parent = self._parent()
+        if parent is None:
+            return self._key
+        name = _joinNamePath(parent._name, self._key)
+        object.__setattr__(self, "_nameCache", name)
+        return name
+
+    _name = property(_getName)
 
     def validate(self):
         """!Validate the Config; raise an exception if invalid
@@ -686,8 +1096,43 @@ class Config(with_metaclass(ConfigMeta, object)):
         Inter-field relationships should only be checked in derived Config
         classes after calling this method, and base validation is complete
         """
-        for field in self._fields.values():
-            field.validate(self)
+        with instrumentation.timer("validate", self):
+            for field in self._fields.values():
+                field.validate(self)
+
+    def subscribe(self, callback):
+        """!Call a function after each change to a field of this Config or of its sub-configs
+
+        @param[in] callback  callable called as callback(path, old, new, label), where path is the
+            name of the changed field relative to this config (e.g. "sub.field", "dictField['key']"),
+            old and new are its values before and after the change and label is the history label
+            of the change. Changes to lists and dicts as a whole are reported with copies of the
+            old and new contents; setting or deleting a single dict item is reported with the
+            item's path, with None for the missing old or new value. Selections of choice fields
+            are reported as "field.name" or "field.names", and retargets as "field.target".
+        @return callback, so that this may be used as a decorator
+
+        Observers are not notified of the values set while a config is being constructed.
+        """
+        observers = self._observers
+        if observers is None:
+            observers = self._observers = []
+            ref = weakref.ref(self, _forgetObservers)
+            _observerLists[id(ref)] = (ref, observers)
+        observers.append(callback)
+        Config._observerCount += 1
+        return callback
+
+    def unsubscribe(self, callback):
+        """!Stop calling a function registered with subscribe
+
+        @throw ValueError if callback is not subscribed to this config
+        """
+        observers = self._observers
+        if not observers or callback not in observers:
+            raise ValueError("%r is not subscribed to this config" % (callback,))
+        observers.remove(callback)
+        Config._observerCount -= 1
 
     def formatHistory(self, name, **kwargs):
         """!Format the specified config field's history to a more human-readable format
@@ -721,11 +1166,9 @@ class Config(with_metaclass(ConfigMeta, object)):
             # This allows Field descriptors to work.
             self._fields[attr].__set__(self, value, at=at, label=label)
         elif hasattr(getattr(self.__class__, attr, None), '__set__'):
-            # This allows properties and other non-Field descriptors to work.
+            # This allows properties, other non-Field descriptors and the private
+            # attributes in __slots__ to work.
             return object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ("_name", "_history", "_storage", "_frozen", "_imports"):
-            # This allows specific private attributes to work.
-            self.__dict__[attr] = value
         else:
             # We throw everything else.
             raise AttributeError("%s has no attribute %s" % (_typeStr(self), attr))
@@ -740,13 +1183,8 @@ class Config(with_metaclass(ConfigMeta, object)):
 
     def __eq__(self, other):
         if type(other) == type(self):
-            for name in self._fields:
-                thisValue = getattr(self, name)
-                otherValue = getattr(other, name)
-                if isinstance(thisValue, float) and math.isnan(thisValue):
-                    if not math.isnan(otherValue):
-                        return False
-                elif thisValue != otherValue:
+            for name, field in self._fields.items():
+                if not field._valuesEqual(getattr(self, name), getattr(other, name)):
                     return False
             return True
         return False
@@ -24,10 +24,13 @@ from builtins import str
 
 import copy
 import collections
+import weakref
 
-from .config import Config, Field, FieldValidationError, _typeStr, _joinNamePath
+from .config import Config, Field, FieldValidationError, _typeStr, _joinNamePath, _notifyObservers, \
+    _isObserved, _FieldDoc, _dereference
 from .comparison import getComparisonName, compareScalars, compareConfigs
 from .callStack import getCallStack, getStackFrame
+from .snapshot import ChoiceSnapshot
 
 __all__ = ["ConfigChoiceField"]
 
@@ -41,12 +44,13 @@ class SelectionSet(collections.MutableSet):
     items from the set of active configs. Each change to the selection is
     tracked in the field's history.
     """
+    __slots__ = ("_dictRef", "_field", "__history", "_set")
+
     def __init__(self, dict_, value, at=None, label="assignment", setHistory=True):
         if at is None:
             at = getCallStack()
-        self._dict = dict_
-        self._field = self._dict._field
-        self._config = self._dict._config
+        self._dictRef = weakref.ref(dict_)
+        self._field = dict_._field
         self.__history = self._config._history.setdefault(self._field.name, [])
         if value is not None:
             try:
@@ -64,6 +68,10 @@ class SelectionSet(collections.MutableSet):
         if setHistory:
             self.__history.append(("Set selection to %s" % self, at, label))
 
+    # held weakly, so that the ConfigInstanceDict and this do not form a reference cycle
+    _dict = property(lambda x: _dereference(x._dictRef, x))
+    _config = property(lambda x: x._dict._config)
+
     def add(self, value, at=None):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
@@ -77,7 +85,12 @@ class SelectionSet(collections.MutableSet):
             self._dict.__getitem__(value, at=at)
 
         self.__history.append(("added %s to selection" % value, at, "selection"))
-        self._set.add(value)
+        if Config._observerCount and _isObserved(self._config):
+            old = list(self._set)
+            self._set.add(value)
+            _notifyObservers(self._config, self._field.name + ".names", old, list(self._set), "selection")
+        else:
+            self._set.add(value)
 
     def discard(self, value, at=None):
         if self._config._frozen:
@@ -91,7 +104,12 @@ class SelectionSet(collections.MutableSet):
             at = getCallStack()
 
         self.__history.append(("removed %s from selection" % value, at, "selection"))
-        self._set.discard(value)
+        if Config._observerCount and _isObserved(self._config):
+            old = list(self._set)
+            self._set.discard(value)
+            _notifyObservers(self._config, self._field.name + ".names", old, list(self._set), "selection")
+        else:
+            self._set.discard(value)
 
     def __len__(self):
         return len(self._set)
@@ -115,17 +133,22 @@ class ConfigInstanceDict(collections.Mapping):
     typemap must support the following:
     - typemap[name]: return the config class associated with the given name
     """
+    __slots__ = ("_dict", "_selection", "_configRef", "_field", "_history", "__weakref__")
+    __doc__ = _FieldDoc(__doc__)
+
     def __init__(self, config, field):
         collections.Mapping.__init__(self)
         self._dict = dict()
         self._selection = None
-        self._config = config
+        self._configRef = weakref.ref(config)
         self._field = field
         self._history = config._history.setdefault(field.name, [])
-        self.__doc__ = field.doc
 
     types = property(lambda x: x._field.typemap)
 
+    # held weakly, so that the Config and this do not form a reference cycle
+    _config = property(lambda x: _dereference(x._configRef, x))
+
     def __contains__(self, k):
         return k in self._field.typemap
 
@@ -142,6 +165,12 @@ class ConfigInstanceDict(collections.Mapping):
         if at is None:
             at = getCallStack(1)
 
+        observed = Config._observerCount and _isObserved(self._config)
+        if observed:
+            old = self._selection
+            if old is not None and self._field.multi:
+                old = list(old)
+
         if value is None:
             self._selection = None
         elif self._field.multi:
@@ -151,6 +180,12 @@ class ConfigInstanceDict(collections.Mapping):
                 self.__getitem__(value, at=at)  # just invoke __getitem__ to make sure it's present
             self._selection = value
         self._history.append((value, at, label))
+        if observed:
+            if self._field.multi:
+                new = list(self._selection) if self._selection is not None else None
+                _notifyObservers(self._config, self._field.name + ".names", old, new, label)
+            else:
+                _notifyObservers(self._config, self._field.name + ".name", old, self._selection, label)
 
     def _getNames(self):
         if not self._field.multi:
@@ -225,11 +260,12 @@ class ConfigInstanceDict(collections.Mapping):
             except Exception:
                 raise FieldValidationError(self._field, self._config,
                                            "Unknown key %r in Registry/ConfigChoiceField" % k)
-            name = _joinNamePath(self._config._name, self._field.name, k)
+            name = _joinNamePath(name=self._field.name, index=k)
             if at is None:
                 at = getCallStack()
                 at.insert(0, dtype._source)
-            value = self._dict.setdefault(k, dtype(__name=name, __at=at, __label=label))
+            value = self._dict.setdefault(k, dtype(__name=name, __parent=self._config, __at=at,
+                                                   __label=label))
         return value
 
     def __setitem__(self, k, value, at=None, label="assignment"):
@@ -248,29 +284,22 @@ class ConfigInstanceDict(collections.Mapping):
 
         if at is None:
             at = getCallStack()
-        name = _joinNamePath(self._config._name, self._field.name, k)
+        name = _joinNamePath(name=self._field.name, index=k)
         oldValue = self._dict.get(k, None)
         if oldValue is None:
             if value == dtype:
-                self._dict[k] = value(__name=name, __at=at, __label=label)
+                self._dict[k] = value(__name=name, __parent=self._config, __at=at, __label=label)
             else:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label, **value._storage)
+                self._dict[k] = dtype(__name=name, __parent=self._config, __at=at, __label=label,
+                                      **value._fullStorage())
+        elif value == dtype:
+            oldValue._resetToDefaults(at, label)
         else:
-            if value == dtype:
-                value = value()
-            oldValue.update(__at=at, __label=label, **value._storage)
-
-    def _rename(self, fullname):
-        for k, v in self._dict.items():
-            v._rename(_joinNamePath(name=fullname, index=k))
+            oldValue.update(__at=at, __label=label, **value._fullStorage())
 
     def __setattr__(self, attr, value, at=None, label="assignment"):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
-            # This allows properties to work.
-            object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_history", "_field", "_config", "_dict",
-                                               "_selection", "__doc__"]:
-            # This allows specific private attributes to work.
+            # This allows properties and the private attributes in __slots__ to work.
             object.__setattr__(self, attr, value)
         else:
             # We throw everything else.
@@ -330,7 +359,6 @@ class ConfigChoiceField(Field):
         if instanceDict is None:
             at = getCallStack(1)
             instanceDict = self.dtype(instance, self)
-            instanceDict.__doc__ = self.doc
             instance._storage[self.name] = instanceDict
             history = instance._history.setdefault(self.name, [])
             history.append(("Initialized from defaults", at, label))
@@ -357,10 +385,11 @@ class ConfigChoiceField(Field):
         else:
             instanceDict._setSelection(value, at=at, label=label)
 
-    def rename(self, instance):
-        instanceDict = self.__get__(instance)
-        fullname = _joinNamePath(instance._name, self.name)
-        instanceDict._rename(fullname)
+    def _resetToDefault(self, instance, at, label):
+        instanceDict = self._getOrMake(instance)
+        for k in list(instanceDict._dict):
+            instanceDict.__setitem__(k, instanceDict.types[k], at=at, label=label)
+        instanceDict._setSelection(self.default, at=at, label=label)
 
     def validate(self, instance):
         instanceDict = self.__get__(instance)
@@ -390,6 +419,27 @@ class ConfigChoiceField(Field):
 
         return dict_
 
+    def _snapshot(self, instance):
+        instanceDict = self.__get__(instance)
+        items = [(k, v.snapshot()) for k, v in instanceDict.items()]
+        if self.multi:
+            selection = instanceDict._selection
+            return ChoiceSnapshot(items, names=list(selection) if selection is not None else ())
+        return ChoiceSnapshot(items, name=instanceDict._selection)
+
+    def _iterLeaves(self, instance, path):
+        instanceDict = self.__get__(instance)
+        if self.multi:
+            names = instanceDict.names
+            yield path + ".names", list(names) if names is not None else None
+        else:
+            yield path + ".name", instanceDict.name
+        if not instanceDict:
+            yield path + ".values", {}
+        for k, v in instanceDict.items():
+            for leaf in v.iterLeaves("%s.values.%s" % (path, k)):
+                yield leaf
+
     def freeze(self, instance):
         instanceDict = self.__get__(instance)
         for v in instanceDict.values():
@@ -21,13 +21,24 @@
 #
 from __future__ import print_function
 
-from .config import Config, FieldValidationError, _autocast, _typeStr, _joinNamePath
+import io
+import threading
+import weakref
+
+from .config import Config, FieldValidationError, _autocast, _typeStr, _joinNamePath, _notifyObservers, \
+    _isObserved, _FieldDoc, _namedAsRoot
 from .dictField import Dict, DictField
 from .comparison import compareConfigs, compareScalars, getComparisonName
+from .snapshot import FrozenDict
 from .callStack import getCallStack, getStackFrame
+from . import instrumentation
 
 __all__ = ["ConfigDictField"]
 
+# Serializes the loading of lazy items, which may be read from several threads
+# (e.g. of a frozen config); reentrant, as loading an item may load others
+_loadLock = threading.RLock()
+
 
 class ConfigDict(Dict):
     """
@@ -35,17 +46,108 @@ class ConfigDict(Dict):
 
     Much like Dict, ConfigDict is a custom MutableMapper which tracks the
     history of changes to any of its items.
+
+    Items may also be added lazily, as code that is only executed to create
+    the item when its key is first read; see ConfigDictField's lazy option.
     """
+    __slots__ = ("_pending",)
+    __doc__ = _FieldDoc(__doc__)
+
     def __init__(self, config, field, value, at, label):
+        # key: override code for the items that have not been loaded yet
+        object.__setattr__(self, "_pending", {})
         Dict.__init__(self, config, field, value, at, label, setHistory=False)
         self.history.append(("Dict initialized", at, label))
 
-    def __setitem__(self, k, x, at=None, label="setitem", setHistory=True):
+    def __getitem__(self, k):
+        try:
+            return self._dict[k]
+        except KeyError:
+            # a pending item is only removed from _pending once it is in _dict
+            if k not in self._pending and k not in self._dict:
+                raise
+            return self._loadItem(k)
+
+    def __len__(self):
+        if not self._pending:
+            return len(self._dict)
+        with _loadLock:
+            return len(self._dict) + len(self._pending)
+
+    def __iter__(self):
+        if not self._pending:
+            return iter(self._dict)
+        # iterate over a copy, as reading items while iterating loads them
+        with _loadLock:
+            return iter(list(self._dict) + list(self._pending))
+
+    def __contains__(self, k):
+        return k in self._dict or k in self._pending
+
+    def __repr__(self):
+        self._loadAll()
+        return Dict.__repr__(self)
+
+    def __str__(self):
+        self._loadAll()
+        return Dict.__str__(self)
+
+    def _addLazyItems(self, items, at=None, label="lazy"):
+        """
+        Add items given as a dict of key: override code, that are only
+        created (by executing their code, with the item as "config") when
+        their key is first read
+
+        This is used by the files saved for a lazy ConfigDictField.
+        """
         if self._config._frozen:
-            msg = "Cannot modify a frozen Config. "\
-                  "Attempting to set item at key %r to value %s" % (k, x)
-            raise FieldValidationError(self._field, self._config, msg)
+            raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        if at is None:
+            at = getCallStack()
+        for k, code in items.items():
+            k = _autocast(k, self._field.keytype)
+            if type(k) != self._field.keytype:
+                msg = "Key %r is of type %s, expected type %s" % \
+                    (k, _typeStr(k), _typeStr(self._field.keytype))
+                raise FieldValidationError(self._field, self._config, msg)
+            self._dict.pop(k, None)
+            self._pending[k] = code
+        self.history.append(("Added %d lazily loaded items" % len(items), at, label))
+
+    def _loadItem(self, k):
+        """
+        Create the not-yet-loaded item at key k from its override code, or
+        return it if another thread has just done so
+        """
+        with _loadLock:
+            item = self._dict.get(k)
+            if item is not None:
+                return item
+            code = self._pending[k]
+            dtype = self._field.itemtype
+            name = _joinNamePath(self._config._name, self._field.name, k)
+            at = getCallStack()
+            # link to the parent only once loaded, so that loading is not reported as a change
+            item = dtype(__name=name, __at=at, __label="lazy load")
+            item.loadFromStream(code)
+            item._key = _joinNamePath(name=self._field.name, index=k)
+            item._nameCache = None
+            item._parent = weakref.ref(self._config)
+            if self._config._frozen:
+                item.freeze()
+            self._dict[k] = item
+            del self._pending[k]
+            return item
 
+    def _loadAll(self):
+        """
+        Load all the items that have not been loaded yet
+        """
+        with _loadLock:
+            for k in list(self._pending):
+                self._loadItem(k)
+
+    def _validateItem(self, k, x):
         # validate keytype
         k = _autocast(k, self._field.keytype)
         if type(k) != self._field.keytype:
@@ -54,33 +156,74 @@ class ConfigDict(Dict):
             raise FieldValidationError(self._field, self._config, msg)
 
         # validate itemtype
-        dtype = self._field.itemtype
         if type(x) != self._field.itemtype and x != self._field.itemtype:
             msg = "Value %s at key %r is of incorrect type %s. Expected type %s" % \
                 (x, k, _typeStr(x), _typeStr(self._field.itemtype))
             raise FieldValidationError(self._field, self._config, msg)
+        return k, x
 
-        if at is None:
-            at = getCallStack()
-        name = _joinNamePath(self._config._name, self._field.name, k)
+    def _store(self, k, x, at, label):
+        """
+        Add or modify the item at key k, which must already be validated;
+        return True if the item was added
+        """
+        dtype = self._field.itemtype
+        if k in self._pending:
+            self._loadItem(k)
         oldValue = self._dict.get(k, None)
         if oldValue is None:
+            name = _joinNamePath(name=self._field.name, index=k)
             if x == dtype:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label)
+                self._dict[k] = dtype(__name=name, __parent=self._config, __at=at, __label=label)
             else:
-                self._dict[k] = dtype(__name=name, __at=at, __label=label, **x._storage)
-            if setHistory:
-                self.history.append(("Added item at key %s" % k, at, label))
+                self._dict[k] = dtype(__name=name, __parent=self._config, __at=at, __label=label,
+                                      **x._fullStorage())
+            return True
+        if x == dtype:
+            oldValue._resetToDefaults(at, label)
         else:
-            if x == dtype:
-                x = dtype()
-            oldValue.update(__at=at, __label=label, **x._storage)
+            oldValue.update(__at=at, __label=label, **x._fullStorage())
+        return False
+
+    def __setitem__(self, k, x, at=None, label="setitem", setHistory=True):
+        if self._config._frozen:
+            msg = "Cannot modify a frozen Config. "\
+                  "Attempting to set item at key %r to value %s" % (k, x)
+            raise FieldValidationError(self._field, self._config, msg)
+
+        k, x = self._validateItem(k, x)
+        if at is None:
+            at = getCallStack()
+        if self._store(k, x, at, label):
             if setHistory:
-                self.history.append(("Modified item at key %s" % k, at, label))
+                self.history.append(("Added item at key %s" % k, at, label))
+                if Config._observerCount and _isObserved(self._config):
+                    _notifyObservers(self._config, _joinNamePath(name=self._field.name, index=k),
+                                     None, self._dict[k], label)
+        elif setHistory:
+            self.history.append(("Modified item at key %s" % k, at, label))
+
+    def _update(self, items, at, label, setHistory=True):
+        if self._config._frozen:
+            raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        items = [self._validateItem(k, x) for k, x in items]
+        if not items:
+            return
+        if at is None:
+            at = getCallStack()
+        added = [k for k, x in items if self._store(k, x, at, label)]
+        if setHistory:
+            self.history.append(("Updated items at keys %s" % ", ".join(str(k) for k, x in items), at, label))
+            if Config._observerCount and _isObserved(self._config):
+                for k in added:
+                    _notifyObservers(self._config, _joinNamePath(name=self._field.name, index=k),
+                                     None, self._dict[k], label)
 
     def __delitem__(self, k, at=None, label="delitem"):
         if at is None:
             at = getCallStack()
+        if k in self._pending:
+            self._loadItem(k)
         Dict.__delitem__(self, k, at, label, False)
         self.history.append(("Removed item at key %s" % k, at, label))
 
@@ -96,11 +239,18 @@ class ConfigDictField(DictField):
     is for configuring mappings for dataset types in a butler. In this case,
     the dataset type names are arbitrary and user-selected; the mapping
     configurations are known and fixed.
+
+    If lazy is True, each item is saved as a separate segment of code, which
+    is only executed to create the item when its key is first read after
+    loading; this makes loading fast when there are many items but few are
+    used.  Validating, comparing, converting to a dict or printing the
+    ConfigDict loads all its items; freezing it does not.
     """
 
     DictClass = ConfigDict
 
-    def __init__(self, doc, keytype, itemtype, default=None, optional=False, dictCheck=None, itemCheck=None):
+    def __init__(self, doc, keytype, itemtype, default=None, optional=False, dictCheck=None, itemCheck=None,
+                 lazy=False):
         source = getStackFrame()
         self._setup(doc=doc, dtype=ConfigDict, default=default, check=None,
                     optional=optional, source=source)
@@ -119,13 +269,7 @@ class ConfigDictField(DictField):
         self.itemtype = itemtype
         self.dictCheck = dictCheck
         self.itemCheck = itemCheck
-
-    def rename(self, instance):
-        configDict = self.__get__(instance)
-        if configDict is not None:
-            for k in configDict:
-                fullname = _joinNamePath(instance._name, self.name, k)
-                configDict[k]._rename(fullname)
+        self.lazy = lazy
 
     def validate(self, instance):
         value = self.__get__(instance)
@@ -133,7 +277,8 @@ class ConfigDictField(DictField):
             for k in value:
                 item = value[k]
                 item.validate()
-                if self.itemCheck is not None and not self.itemCheck(item):
+                if self.itemCheck is not None and \
+                        not instrumentation.callCheck(self.itemCheck, item, self, instance):
                     msg = "Item at key %r is not a valid value: %s" % (k, item)
                     raise FieldValidationError(self, instance, msg)
         DictField.validate(self, instance)
@@ -149,6 +294,24 @@ class ConfigDictField(DictField):
 
         return dict_
 
+    def _snapshot(self, instance):
+        configDict = self.__get__(instance)
+        if configDict is None:
+            return None
+        return FrozenDict((k, v.snapshot()) for k, v in configDict.items())
+
+    def _iterLeaves(self, instance, path):
+        configDict = self.__get__(instance)
+        if configDict is None:
+            yield path, None
+            return
+        if not configDict:
+            yield path, {}
+            return
+        for k in configDict:
+            for leaf in configDict[k].iterLeaves("%s.%s" % (path, k)):
+                yield leaf
+
     def save(self, outfile, instance):
         configDict = self.__get__(instance)
         fullname = _joinNamePath(instance._name, self.name)
@@ -157,15 +320,28 @@ class ConfigDictField(DictField):
             return
 
         outfile.write(u"{}={!r}\n".format(fullname, {}))
-        for v in configDict.values():
-            outfile.write(u"{}={}()\n".format(v._name, _typeStr(v)))
-            v._save(outfile)
+        if not self.lazy:
+            for v in configDict.values():
+                outfile.write(u"{}={}()\n".format(v._name, _typeStr(v)))
+                v._save(outfile)
+            return
+
+        # One segment of override code per item, keyed by item key; those not
+        # loaded since they were themselves loaded lazily are copied as they are
+        outfile.write(u"{}._addLazyItems({{\n".format(fullname))
+        for k in configDict:
+            code = configDict._pending.get(k)
+            if code is None:
+                code = _saveSegment(configDict._dict[k])
+            outfile.write(u"    {!r}: {!r},\n".format(k, code))
+        outfile.write(u"})\n")
 
     def freeze(self, instance):
         configDict = self.__get__(instance)
         if configDict is not None:
-            for k in configDict:
-                configDict[k].freeze()
+            # items not loaded yet are frozen when they are loaded
+            for item in configDict._dict.values():
+                item.freeze()
 
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Helper function for Config.compare; used to compare two fields for equality.
@@ -197,3 +373,13 @@ class ConfigDictField(DictField):
                 return False
             equal = equal and result
         return equal
+
+
+def _saveSegment(config):
+    """
+    Return the override code that reproduces config as the variable "config"
+    """
+    stream = io.StringIO()
+    with _namedAsRoot(config, "config"):
+        config._save(stream)
+    return stream.getvalue()
@@ -24,6 +24,7 @@ from builtins import str
 from .config import Config, Field, FieldValidationError, _joinNamePath, _typeStr
 from .comparison import compareConfigs, getComparisonName
 from .callStack import getCallStack, getStackFrame
+from . import instrumentation
 
 __all__ = ["ConfigField"]
 
@@ -72,8 +73,6 @@ class ConfigField(Field):
         if instance._frozen:
             raise FieldValidationError(self, instance,
                                        "Cannot modify a frozen Config")
-        name = _joinNamePath(prefix=instance._name, name=self.name)
-
         if value != self.dtype and type(value) != self.dtype:
             msg = "Value %s is of incorrect type %s. Expected %s" % \
                 (value, _typeStr(value), _typeStr(self.dtype))
@@ -85,21 +84,18 @@ class ConfigField(Field):
         oldValue = instance._storage.get(self.name, None)
         if oldValue is None:
             if value == self.dtype:
-                instance._storage[self.name] = self.dtype(__name=name, __at=at, __label=label)
+                instance._storage[self.name] = self.dtype(__name=self.name, __parent=instance, __at=at,
+                                                          __label=label)
             else:
-                instance._storage[self.name] = self.dtype(__name=name, __at=at,
-                                                          __label=label, **value._storage)
+                instance._storage[self.name] = self.dtype(__name=self.name, __parent=instance, __at=at,
+                                                          __label=label, **value._fullStorage())
+        elif value == self.dtype:
+            oldValue._resetToDefaults(at, label)
         else:
-            if value == self.dtype:
-                value = value()
-            oldValue.update(__at=at, __label=label, **value._storage)
+            oldValue.update(__at=at, __label=label, **value._fullStorage())
         history = instance._history.setdefault(self.name, [])
         history.append(("config value set", at, label))
 
-    def rename(self, instance):
-        value = self.__get__(instance)
-        value._rename(_joinNamePath(instance._name, self.name))
-
     def save(self, outfile, instance):
         value = self.__get__(instance)
         value._save(outfile)
@@ -112,11 +108,18 @@ class ConfigField(Field):
         value = self.__get__(instance)
         return value.toDict()
 
+    def _snapshot(self, instance):
+        return self.__get__(instance).snapshot()
+
+    def _iterLeaves(self, instance, path):
+        value = self.__get__(instance)
+        return value.iterLeaves(path)
+
     def validate(self, instance):
         value = self.__get__(instance)
         value.validate()
 
-        if self.check is not None and not self.check(value):
+        if self.check is not None and not instrumentation.callCheck(self.check, value, self, instance):
             msg = "%s is not a valid value" % str(value)
             raise FieldValidationError(self, instance, msg)
 
@@ -23,32 +23,173 @@ from __future__ import print_function
 from builtins import str
 from builtins import object
 
+import collections
 import copy
+import threading
+import weakref
 
-from .config import Config, Field, _joinNamePath, _typeStr, FieldValidationError
+from .config import Config, Field, _joinNamePath, _typeStr, FieldValidationError, _notifyObservers, \
+    _isObserved, _FieldDoc, _dereference
 from .comparison import compareConfigs, getComparisonName
 from .callStack import getCallStack, getStackFrame
+from . import instrumentation
+
+
+class ApplyCache(object):
+    """A bounded cache of the objects built by calling configurable targets
+
+    An ApplyCache may be passed to ConfigurableField or RegistryField (and shared between
+    several fields) to make apply() return a previously built object when it is called
+    with the same target, the same ConfigClass, a config with identical content and the
+    same additional arguments.  Only frozen configs are cached, as the built object
+    usually keeps a reference to its config; calls with an unfrozen config or with
+    unhashable arguments always call the target, without looking at the config's content.
+
+    When more than maxSize objects are cached, the least recently used one is dropped.
+
+    Hit statistics are available as the hits, misses and evictions attributes, or as
+    a dict via stats().
+    """
+
+    def __init__(self, maxSize=16):
+        """Construct an empty cache
+
+        @param maxSize  maximum number of objects to keep; must be positive
+        """
+        if maxSize <= 0:
+            raise ValueError("'maxSize' (%d) must be positive" % maxSize)
+        self.maxSize = maxSize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._cache)
+
+    def call(self, target, config, args=(), kw=None):
+        """Return target(*args, config=config, **kw), reusing a cached result if possible
+        """
+        if kw is None:
+            kw = {}
+        key = None
+        if config._frozen:
+            # the content of a frozen config is its saved script, which it makes only once
+            try:
+                key = (target, type(config), config._getSaved(), args,
+                       tuple(sorted(kw.items())))
+                hash(key)
+            except TypeError:
+                key = None
+        if key is None:
+            with self._lock:
+                self.misses += 1
+            return target(*args, config=config, **kw)
+
+        with self._lock:
+            try:
+                value = self._cache.pop(key)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache[key] = value
+                return value
+
+        value = target(*args, config=config, **kw)
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.maxSize:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """Return a dict of cache statistics: hits, misses, evictions, size and maxSize
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        size=len(self._cache), maxSize=self.maxSize)
+
+    def clear(self):
+        """Drop all cached objects and reset the statistics
+        """
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+class _ValueFieldProxy(object):
+    """A descriptor that reads a field of the config wrapped by a ConfigurableInstance
+
+    Values are read directly from the storage of the wrapped config, falling back to
+    regular attribute access if the field has no stored value.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance._value
+        try:
+            return value._storage[self.name]
+        except KeyError:
+            return getattr(value, self.name)
+
+
+# Cache of ConfigurableInstance subclasses with _ValueFieldProxy descriptors for each field:
+# {ConfigClass: {ConfigurableInstance class: proxy class}}
+_proxyClasses = weakref.WeakKeyDictionary()
 
 
 class ConfigurableInstance(object):
+    __slots__ = ("_configRef", "_field", "_target", "_ConfigClass", "_value")
+    __doc__ = _FieldDoc(None)
+
+    def __new__(cls, config, field, *args, **kw):
+        return object.__new__(cls._getProxyClass(field.ConfigClass))
+
+    @classmethod
+    def _getProxyClass(cls, ConfigClass):
+        """Return a subclass of cls with direct read access to the fields of ConfigClass
+
+        Reads of fields of the wrapped config then do not have to go through __getattr__.
+        Fields whose names clash with attributes of ConfigurableInstance are not proxied.
+        """
+        base = getattr(cls, "_proxyBase", cls)
+        proxies = _proxyClasses.setdefault(ConfigClass, {})
+        proxyClass = proxies.get(base)
+        if proxyClass is None:
+            attrs = {"_proxyBase": base, "__module__": base.__module__, "__slots__": (),
+                     "__doc__": _FieldDoc(base.__doc__)}
+            for name in ConfigClass._fields:
+                if not hasattr(base, name):
+                    attrs[name] = _ValueFieldProxy(name)
+            proxyClass = type(base.__name__, (base,), attrs)
+            proxies[base] = proxyClass
+        return proxyClass
+
     def __initValue(self, at, label):
         """
         if field.default is an instance of ConfigClass, custom construct
         _value with the correct values from default.
         otherwise call ConfigClass constructor
         """
-        name = _joinNamePath(self._config._name, self._field.name)
+        name = self._field.name
         if type(self._field.default) == self.ConfigClass:
-            storage = self._field.default._storage
+            storage = self._field.default._fullStorage()
         else:
             storage = {}
-        value = self._ConfigClass(__name=name, __at=at, __label=label, **storage)
+        value = self._ConfigClass(__name=name, __parent=self._config, __at=at, __label=label, **storage)
         object.__setattr__(self, "_value", value)
 
     def __init__(self, config, field, at=None, label="default"):
-        object.__setattr__(self, "_config", config)
+        object.__setattr__(self, "_configRef", weakref.ref(config))
         object.__setattr__(self, "_field", field)
-        object.__setattr__(self, "__doc__", config)
         object.__setattr__(self, "_target", field.target)
         object.__setattr__(self, "_ConfigClass", field.ConfigClass)
         object.__setattr__(self, "_value", None)
@@ -75,11 +216,18 @@ class ConfigurableInstance(object):
     """
     value = property(lambda x: x._value)
 
+    # held weakly, so that the Config and this do not form a reference cycle
+    _config = property(lambda x: _dereference(x._configRef, x))
+
     def apply(self, *args, **kw):
         """
         Call the confirurable.
         With argument config=self.value along with any positional and kw args
+
+        If the field has an applyCache, a previously built configurable may be returned.
         """
+        if self._field.applyCache is not None:
+            return self._field.applyCache.call(self.target, self.value, args, kw)
         return self.target(*args, config=self.value, **kw)
 
     """
@@ -96,14 +244,18 @@ class ConfigurableInstance(object):
 
         if at is None:
             at = getCallStack()
+        oldTarget = self._target
         object.__setattr__(self, "_target", target)
         if ConfigClass != self.ConfigClass:
             object.__setattr__(self, "_ConfigClass", ConfigClass)
             self.__initValue(at, label)
+            object.__setattr__(self, "__class__", self._getProxyClass(ConfigClass))
 
         history = self._config._history.setdefault(self._field.name, [])
         msg = "retarget(target=%s, ConfigClass=%s)" % (_typeStr(target), _typeStr(ConfigClass))
         history.append((msg, at, label))
+        if Config._observerCount and _isObserved(self._config):
+            _notifyObservers(self._config, self._field.name + ".target", oldTarget, target, label)
 
     def __getattr__(self, name):
         return getattr(self._value, name)
@@ -116,7 +268,7 @@ class ConfigurableInstance(object):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
 
-        if name in self.__dict__:
+        if name in ConfigurableInstance.__slots__:
             # attribute exists in the ConfigurableInstance wrapper
             object.__setattr__(self, name, value)
         else:
@@ -168,12 +320,14 @@ class ConfigurableField(Field):
                              "(must have '__module__' and '__name__' attributes)")
         return ConfigClass
 
-    def __init__(self, doc, target, ConfigClass=None, default=None, check=None):
+    def __init__(self, doc, target, ConfigClass=None, default=None, check=None, applyCache=None):
         """
         @param target is the configurable target. Must be callable, and the first
                 parameter will be the value of this field
         @param ConfigClass is the class of Config object expected by the target.
                 If not provided by target.ConfigClass it must be provided explicitly in this argument
+        @param applyCache is an optional ApplyCache used by apply() to reuse configurables
+                built from identical frozen configs
         """
         ConfigClass = self.validateTarget(target, ConfigClass)
 
@@ -188,6 +342,7 @@ class ConfigurableField(Field):
                     check=check, optional=False, source=source)
         self.target = target
         self.ConfigClass = ConfigClass
+        self.applyCache = applyCache
 
     def __getOrMake(self, instance, at=None, label="default"):
         value = instance._storage.get(self.name, None)
@@ -213,21 +368,23 @@ class ConfigurableField(Field):
 
         if isinstance(value, ConfigurableInstance):
             oldValue.retarget(value.target, value.ConfigClass, at, label)
-            oldValue.update(__at=at, __label=label, **value._storage)
+            oldValue.update(__at=at, __label=label, **value._fullStorage())
         elif type(value) == oldValue._ConfigClass:
-            oldValue.update(__at=at, __label=label, **value._storage)
+            oldValue.update(__at=at, __label=label, **value._fullStorage())
         elif value == oldValue.ConfigClass:
-            value = oldValue.ConfigClass()
-            oldValue.update(__at=at, __label=label, **value._storage)
+            oldValue._value._resetToDefaults(at, label)
         else:
             msg = "Value %s is of incorrect type %s. Expected %s" % \
                 (value, _typeStr(value), _typeStr(oldValue.ConfigClass))
             raise FieldValidationError(self, instance, msg)
 
-    def rename(self, instance):
-        fullname = _joinNamePath(instance._name, self.name)
-        value = self.__getOrMake(instance)
-        value._rename(fullname)
+    def _resetToDefault(self, instance, at, label):
+        value = self.__getOrMake(instance, at=at, label=label)
+        if value.target != self.target or value.ConfigClass != self.ConfigClass:
+            value.retarget(self.target, self.ConfigClass, at, label)
+        value._value._resetToDefaults(at, label)
+        if type(self.default) == self.ConfigClass:
+            value.update(__at=at, __label=label, **self.default._fullStorage())
 
     def save(self, outfile, instance):
         fullname = _joinNamePath(instance._name, self.name)
@@ -254,11 +411,18 @@ class ConfigurableField(Field):
         value = self.__get__(instance)
         return value.toDict()
 
+    def _snapshot(self, instance):
+        return self.__get__(instance).value.snapshot()
+
+    def _iterLeaves(self, instance, path):
+        value = self.__get__(instance)
+        return value.value.iterLeaves(path)
+
     def validate(self, instance):
         value = self.__get__(instance)
         value.validate()
 
-        if self.check is not None and not self.check(value):
+        if self.check is not None and not instrumentation.callCheck(self.check, value, self, instance):
             msg = "%s is not a valid value" % str(value)
             raise FieldValidationError(self, instance, msg)
 
@@ -268,7 +432,7 @@ class ConfigurableField(Field):
         WARNING: this must be overridden by subclasses if they change the constructor signature!
         """
         return type(self)(doc=self.doc, target=self.target, ConfigClass=self.ConfigClass,
-                          default=copy.deepcopy(self.default))
+                          default=copy.deepcopy(self.default), applyCache=self.applyCache)
 
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Helper function for Config.compare; used to compare two fields for equality.
@@ -19,40 +19,119 @@
 # the GNU General Public License along with this program.  If not,
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
-import lsst.pex.policy
-import lsst.daf.base
+import json
 
+__all__ = ("makePropertySet", "makePolicy", "exportLeaves",
+           "LeafSink", "PropertySetSink", "PolicySink", "FlatDictSink", "JsonLinesSink")
 
-def makePropertySet(config):
-    def _helper(ps, prefix, dict_):
-        for k, v in dict_.items():
-            name = prefix + "." + k if prefix is not None else k
-            if isinstance(v, dict):
-                _helper(ps, name, v)
-            elif v is not None:
-                ps.set(name, v)
+# lsst.pex.policy and lsst.daf.base are only imported when a PolicySink or
+# PropertySetSink is constructed, so that importing lsst.pex.config is fast.
+
+
+class LeafSink(object):
+    """Base class for consumers of the (dotted name, value) pairs generated by Config.iterLeaves
+
+    Subclasses must implement add(name, value), and may implement finish() to return a result.
+    See exportLeaves.
+    """
+
+    def add(self, name, value):
+        """Consume a single leaf; value may be None"""
+        raise NotImplementedError("LeafSink subclasses must implement add")
+
+    def finish(self):
+        """Called after the last leaf; the return value is returned by exportLeaves"""
+        return None
+
+
+class PropertySetSink(LeafSink):
+    """Sink that sets each non-None leaf in a new lsst.daf.base.PropertySet
+
+    Empty dicts (empty sub-configs or containers) are left out.
+    """
+
+    def __init__(self):
+        import lsst.daf.base
+        self.ps = lsst.daf.base.PropertySet()
+
+    def add(self, name, value):
+        if value is not None and not isinstance(value, dict):
+            self.ps.set(name, value)
+
+    def finish(self):
+        return self.ps
+
+
+class PolicySink(LeafSink):
+    """Sink that sets each non-None leaf in a new lsst.pex.policy.Policy
+
+    List values are added one item at a time, and empty dicts (empty sub-configs or
+    containers) become empty sub-Policies.
+    """
+
+    def __init__(self):
+        import lsst.pex.policy
+        self.policy = lsst.pex.policy.Policy()
 
+    def add(self, name, value):
+        if isinstance(value, list):
+            for v in value:
+                self.policy.add(name, v)
+        elif isinstance(value, dict):
+            self.policy.set(name, type(self.policy)())
+        elif value is not None:
+            self.policy.set(name, value)
+
+    def finish(self):
+        return self.policy
+
+
+class FlatDictSink(LeafSink):
+    """Sink that collects all leaves, including None values and empty dicts, in a flat dict keyed by
+    dotted name"""
+
+    def __init__(self):
+        self.dict = {}
+
+    def add(self, name, value):
+        self.dict[name] = value
+
+    def finish(self):
+        return self.dict
+
+
+class JsonLinesSink(LeafSink):
+    """Sink that writes each leaf to a text stream as a line of JSON: {"name": ..., "value": ...}
+
+    Values that cannot be represented in JSON (e.g. complex numbers) are written as their repr.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def add(self, name, value):
+        self.stream.write(u"%s\n" % json.dumps({"name": name, "value": value}, default=repr))
+
+
+def exportLeaves(config, sink):
+    """Pass every leaf of config, as generated by Config.iterLeaves, to sink.add
+
+    Return the value returned by sink.finish()
+    """
+    for name, value in config.iterLeaves():
+        sink.add(name, value)
+    return sink.finish()
+
+
+def makePropertySet(config):
     if config is not None:
-        ps = lsst.daf.base.PropertySet()
-        _helper(ps, None, config.toDict())
-        return ps
+        return exportLeaves(config, PropertySetSink())
     else:
         return None
 
 
 def makePolicy(config):
-    def _helper(dict_):
-        p = lsst.pex.policy.Policy()
-        for k, v in dict_.items():
-            if isinstance(v, dict):
-                p.set(k, _helper(v))
-            elif isinstance(v, list):
-                for vi in v:
-                    p.add(k, vi)
-            elif v is not None:
-                p.set(k, v)
-        return p
     if config:
-        return _helper(config.toDict())
+        return exportLeaves(config, PolicySink())
     else:
         return None
@@ -0,0 +1,132 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import object
+from past.builtins import basestring
+
+import weakref
+
+from .config import _typeStr
+from .callStack import getStackFrame
+
+__all__ = ["DerivedField"]
+
+
+class DerivedField(object):
+    """
+    A read-only value computed from other fields of a Config, cached until
+    any of those fields changes
+
+    For example:
+
+    class KernelConfig(Config):
+        sigma = Field("Gaussian sigma (pixels)", float, default=1.5)
+        nSigma = Field("Kernel half-width (sigma)", float, default=3.0)
+        kernelSize = DerivedField("Kernel width (pixels)", inputs=["sigma", "nSigma"],
+                                  compute=lambda config: 2*int(config.sigma*config.nSigma) + 1)
+
+    compute is called with the config the first time the value is read, and
+    the result is returned by later reads until one of the inputs is changed
+    (by assignment, update, load, retarget or modification of a list, dict,
+    sub-config or selection), when it is computed afresh on the next read.  Inputs are
+    field names, or dotted paths to fields of sub-configs (e.g. "psf.sigma");
+    an input that holds a sub-config or container covers all changes within
+    it.  Frozen configs cache their derived values for good.
+
+    A DerivedField is not a Field: it cannot be set, and is not saved,
+    validated, compared or included in toDict.
+    """
+
+    def __init__(self, doc, inputs, compute):
+        if isinstance(inputs, basestring):
+            inputs = [inputs]
+        inputs = tuple(inputs)
+        if not inputs:
+            raise ValueError("DerivedField requires at least one input")
+        if not hasattr(compute, "__call__"):
+            raise ValueError("'compute' must be callable")
+        self.doc = doc
+        self.__doc__ = doc
+        self.inputs = inputs
+        self.compute = compute
+        self.source = getStackFrame()
+
+    def dependsOn(self, path):
+        """
+        Return whether a change to the field at path (relative to the config
+        holding this field) affects the value
+        """
+        for name in self.inputs:
+            if path == name or name.startswith(path + ".") or \
+                    (path.startswith(name) and path[len(name)] in ".["):
+                return True
+        return False
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance._derived
+        if cache is None:
+            cache = instance._derived = {}
+        try:
+            return cache[self]
+        except KeyError:
+            pass
+        for name in self.inputs:
+            if name.split(".")[0] not in instance._fields:
+                raise AttributeError("DerivedField input %r is not a field of %s" %
+                                     (name, _typeStr(instance)))
+        value = self.compute(instance)
+        if not cache and not instance._frozen:
+            # watch for changes while anything is cached
+            instance.subscribe(_Invalidator(instance, cache))
+        cache[self] = value
+        return value
+
+    def __set__(self, instance, value):
+        raise AttributeError("DerivedField values are computed and cannot be set")
+
+    def __delete__(self, instance):
+        raise AttributeError("DerivedField values are computed and cannot be deleted")
+
+
+class _Invalidator(object):
+    """
+    Config observer that drops the cached derived values affected by a change,
+    and unsubscribes itself once nothing is cached
+
+    Holds only a weak reference to the config, to avoid a reference cycle.
+    """
+
+    def __init__(self, config, cache):
+        self.config = weakref.ref(config)
+        self.cache = cache
+
+    def __call__(self, path, old, new, label):
+        if label == "retarget":
+            # reported as "field.target", but replaces the whole sub-config
+            path = path[:-len(".target")]
+        for field in [field for field in self.cache if field.dependsOn(path)]:
+            del self.cache[field]
+        if not self.cache:
+            config = self.config()
+            if config is not None:
+                config.unsubscribe(self)
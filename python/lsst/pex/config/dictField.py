@@ -20,12 +20,17 @@
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
 from builtins import str
+from builtins import zip
 
 import collections
+import weakref
 
-from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath
+from .config import Config, Field, FieldValidationError, _typeStr, _autocast, _joinNamePath, \
+    _notifyObservers, _isObserved, _FieldDoc, _dereference
 from .comparison import getComparisonName, compareScalars
+from .snapshot import FrozenDict
 from .callStack import getCallStack, getStackFrame
+from . import instrumentation
 
 __all__ = ["DictField"]
 
@@ -35,18 +40,18 @@ class Dict(collections.MutableMapping):
     Config-Internal mapping container
     Emulates a dict, but adds validation and provenance.
     """
+    __slots__ = ("_field", "_configRef", "_dict", "_history")
+    __doc__ = _FieldDoc(__doc__)
 
     def __init__(self, config, field, value, at, label, setHistory=True):
         self._field = field
-        self._config = config
+        self._configRef = weakref.ref(config)
         self._dict = {}
         self._history = self._config._history.setdefault(self._field.name, [])
-        self.__doc__ = field.doc
         if value is not None:
             try:
-                for k in value:
-                    # do not set history per-item
-                    self.__setitem__(k, value[k], at=at, label=label, setHistory=False)
+                # do not set history per-item
+                self._update([(k, value[k]) for k in value], at=at, label=label, setHistory=False)
             except TypeError:
                 msg = "Value %s is of incorrect type %s. Mapping type expected." % \
                     (value, _typeStr(value))
@@ -59,6 +64,9 @@ class Dict(collections.MutableMapping):
     """
     history = property(lambda x: x._history)
 
+    # held weakly, so that the Config and this do not form a reference cycle
+    _config = property(lambda x: _dereference(x._configRef, x))
+
     def __getitem__(self, k):
         return self._dict[k]
 
@@ -71,12 +79,10 @@ class Dict(collections.MutableMapping):
     def __contains__(self, k):
         return k in self._dict
 
-    def __setitem__(self, k, x, at=None, label="setitem", setHistory=True):
-        if self._config._frozen:
-            msg = "Cannot modify a frozen Config. "\
-                "Attempting to set item at key %r to value %s" % (k, x)
-            raise FieldValidationError(self._field, self._config, msg)
-
+    def _validateItem(self, k, x):
+        """
+        Autocast and validate a key and item, returning them as a tuple
+        """
         # validate keytype
         k = _autocast(k, self._field.keytype)
         if type(k) != self._field.keytype:
@@ -97,27 +103,83 @@ class Dict(collections.MutableMapping):
                 raise FieldValidationError(self._field, self._config, msg)
 
         # validate item using itemcheck
-        if self._field.itemCheck is not None and not self._field.itemCheck(x):
+        if self._field.itemCheck is not None and \
+                not instrumentation.callCheck(self._field.itemCheck, x, self._field, self._config):
             msg = "Item at key %r is not a valid value: %s" % (k, x)
             raise FieldValidationError(self._field, self._config, msg)
+        return k, x
+
+    def __setitem__(self, k, x, at=None, label="setitem", setHistory=True):
+        if self._config._frozen:
+            msg = "Cannot modify a frozen Config. "\
+                "Attempting to set item at key %r to value %s" % (k, x)
+            raise FieldValidationError(self._field, self._config, msg)
+
+        k, x = self._validateItem(k, x)
 
         if at is None:
             at = getCallStack()
 
+        observed = setHistory and Config._observerCount and _isObserved(self._config)
+        if observed:
+            old = self._dict.get(k)
         self._dict[k] = x
         if setHistory:
             self._history.append((dict(self._dict), at, label))
+        if observed:
+            _notifyObservers(self._config, _joinNamePath(name=self._field.name, index=k), old, x, label)
 
     def __delitem__(self, k, at=None, label="delitem", setHistory=True):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
 
-        del self._dict[k]
+        old = self._dict.pop(k)
         if setHistory:
             if at is None:
                 at = getCallStack()
             self._history.append((dict(self._dict), at, label))
+        if Config._observerCount and _isObserved(self._config):
+            _notifyObservers(self._config, _joinNamePath(name=self._field.name, index=k), old, None, label)
+
+    def update(self, *args, **kw):
+        """
+        Update from a mapping or iterable of (key, item) pairs and/or keyword
+        arguments, like dict.update
+
+        All keys and items are validated before any are set, and the update
+        records a single history entry.  The call stack and label to record
+        may be given as the keyword arguments __at and __label.
+        """
+        at = kw.pop("__at", None)
+        label = kw.pop("__label", "update")
+        if len(args) > 1:
+            raise TypeError("update expected at most 1 argument, got %d" % len(args))
+        if at is None:
+            at = getCallStack()
+        items = dict(*args, **kw)
+        self._update(list(items.items()), at=at, label=label)
+
+    def _update(self, items, at, label, setHistory=True):
+        """
+        Validate and then set a list of (key, item) pairs, recording a single
+        history entry
+        """
+        if self._config._frozen:
+            raise FieldValidationError(self._field, self._config, "Cannot modify a frozen Config")
+        items = [self._validateItem(k, x) for k, x in items]
+        if not items:
+            return
+        observed = setHistory and Config._observerCount and _isObserved(self._config)
+        if observed:
+            old = [self._dict.get(k) for k, x in items]
+        self._dict.update(items)
+        if setHistory:
+            self._history.append((dict(self._dict), at, label))
+        if observed:
+            for (k, x), oldItem in zip(items, old):
+                _notifyObservers(self._config, _joinNamePath(name=self._field.name, index=k), oldItem, x,
+                                 label)
 
     def __repr__(self):
         return repr(self._dict)
@@ -127,10 +189,7 @@ class Dict(collections.MutableMapping):
 
     def __setattr__(self, attr, value, at=None, label="assignment"):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
-            # This allows properties to work.
-            object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_field", "_config", "_history", "_dict", "__doc__"]:
-            # This allows specific private attributes to work.
+            # This allows properties and the private attributes in __slots__ to work.
             object.__setattr__(self, attr, value)
         else:
             # We throw everything else.
@@ -149,6 +208,8 @@ class DictField(Field):
         dictCheck: used to validate the dict as a whole, and
         itemCheck: used to validate each item individually
 
+    A defaultFactory may be given instead of a default, as for Field.
+
     For example to define a field which is a mapping from names to int values:
 
     class MyConfig(Config):
@@ -159,10 +220,11 @@ class DictField(Field):
     """
     DictClass = Dict
 
-    def __init__(self, doc, keytype, itemtype, default=None, optional=False, dictCheck=None, itemCheck=None):
+    def __init__(self, doc, keytype, itemtype, default=None, optional=False, dictCheck=None, itemCheck=None,
+                 defaultFactory=None):
         source = getStackFrame()
         self._setup(doc=doc, dtype=Dict, default=default, check=None,
-                    optional=optional, source=source)
+                    optional=optional, source=source, defaultFactory=defaultFactory)
         if keytype not in self.supportedTypes:
             raise ValueError("'keytype' %s is not a supported type" %
                              _typeStr(keytype))
@@ -188,7 +250,7 @@ class DictField(Field):
         Field.validate(self, instance)
         value = self.__get__(instance)
         if value is not None and self.dictCheck is not None \
-                and not self.dictCheck(value):
+                and not instrumentation.callCheck(self.dictCheck, value, self, instance):
             msg = "%s is not a valid value" % str(value)
             raise FieldValidationError(self, instance, msg)
 
@@ -206,12 +268,22 @@ class DictField(Field):
             history = instance._history.setdefault(self.name, [])
             history.append((value, at, label))
 
-        instance._storage[self.name] = value
+        if Config._observerCount and _isObserved(instance):
+            old = instance._storage.get(self.name)
+            instance._storage[self.name] = value
+            _notifyObservers(instance, self.name, dict(old) if old is not None else None,
+                             dict(value) if value is not None else None, label)
+        else:
+            instance._storage[self.name] = value
 
     def toDict(self, instance):
         value = self.__get__(instance)
         return dict(value) if value is not None else None
 
+    def _snapshot(self, instance):
+        value = self.__get__(instance)
+        return FrozenDict(value._dict) if value is not None else None
+
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Helper function for Config.compare; used to compare two fields for equality.
 
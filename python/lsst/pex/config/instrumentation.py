@@ -0,0 +1,277 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+"""Opt-in counters and timers for Config operations
+
+When enabled, the following operations are counted and timed, both in total
+and per key (the Config class name or "ConfigClass.fieldName"):
+
+- getCallStack: capturing the call stack recorded in field histories
+- validateValue: type and value checks when a field is set
+- check: user-supplied check callables (check, itemCheck, listCheck, dictCheck)
+- loadFromStream: executing config override code (including Config.load)
+- saveToStream: writing a config (including Config.save and pickling)
+- validate: Config.validate, including sub-configs
+- setDefaults: Config.setDefaults, including the construction of sub-configs
+  it triggers
+
+The coarser of these operations (all but getCallStack, validateValue and
+check), and the imports made while loading, are also reported to any
+registered listeners, such as lsst.pex.config.tracing.Tracer.
+
+Instrumentation is off by default; the hooks then cost a single test of the
+module-level 'enabled' flag.
+"""
+from __future__ import print_function, division, absolute_import
+
+__all__ = ("enableStats", "disableStats", "statsEnabled", "stats", "resetStats")
+
+from builtins import object
+
+import threading
+import timeit
+
+# Checked by every hook; True while statistics are being collected or
+# any listener is registered
+enabled = False
+
+_statsEnabled = False
+_listeners = []
+_now = timeit.default_timer
+_lock = threading.Lock()
+_counts = {}  # (operation, key): number of calls
+_times = {}  # (operation, key): cumulative seconds
+
+
+def enableStats(reset=True):
+    """Start collecting statistics on Config operations
+
+    Parameters
+    ----------
+    reset : `bool`
+        Discard any statistics collected so far?
+    """
+    global _statsEnabled
+    if reset:
+        resetStats()
+    _statsEnabled = True
+    _update()
+
+
+def disableStats():
+    """Stop collecting statistics; those already collected are kept"""
+    global _statsEnabled
+    _statsEnabled = False
+    _update()
+
+
+def statsEnabled():
+    """Return whether statistics are being collected"""
+    return _statsEnabled
+
+
+def addListener(listener):
+    """Report instrumented operations to a listener
+
+    Parameters
+    ----------
+    listener : `object`
+        An object with methods begin(operation, config, args),
+        end(operation, config, args) and instant(operation, args), called at
+        the start and end of each span and for point events.  config is the
+        Config the operation applies to (or None), and args a dict of extra
+        information about it.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+    _update()
+
+
+def removeListener(listener):
+    """Stop reporting instrumented operations to a listener"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+    _update()
+
+
+def _update():
+    global enabled
+    enabled = _statsEnabled or bool(_listeners)
+
+
+def resetStats():
+    """Discard all statistics collected so far"""
+    with _lock:
+        _counts.clear()
+        _times.clear()
+
+
+def record(operation, key, seconds):
+    """Record one call of an operation
+
+    Parameters
+    ----------
+    operation : `str`
+        Name of the operation.
+    key : `str` or `None`
+        Config class name or "ConfigClass.fieldName" the call applies to.
+    seconds : `float`
+        Time spent in the call.
+    """
+    if not _statsEnabled:
+        return
+    k = (operation, key)
+    with _lock:
+        _counts[k] = _counts.get(k, 0) + 1
+        _times[k] = _times.get(k, 0.0) + seconds
+
+
+def stats():
+    """Return a snapshot of the statistics collected so far
+
+    Returns
+    -------
+    stats : `dict`
+        A dict of operation name: dict with keys "count" (number of calls),
+        "time" (cumulative seconds) and "byKey" (a dict of
+        key: {"count": ..., "time": ...} for the calls made with a key).
+    """
+    result = {}
+    with _lock:
+        for (operation, key), count in _counts.items():
+            entry = result.setdefault(operation, {"count": 0, "time": 0.0, "byKey": {}})
+            seconds = _times[(operation, key)]
+            entry["count"] += count
+            entry["time"] += seconds
+            if key is not None:
+                entry["byKey"][key] = {"count": count, "time": seconds}
+    return result
+
+
+def fieldKey(config, field):
+    """Return the statistics key for a field of a config"""
+    return "%s.%s" % (type(config).__name__, field.name)
+
+
+def callTimed(operation, key, func, *args):
+    """Call func(*args), recording the time spent if statistics are being collected
+
+    Unlike timer(), this is not reported to the listeners.
+    """
+    if not _statsEnabled:
+        return func(*args)
+    start = _now()
+    try:
+        return func(*args)
+    finally:
+        record(operation, key, _now() - start)
+
+
+def callCheck(check, value, field, config=None):
+    """Call a user check callable, timing it if statistics are being collected
+
+    Parameters
+    ----------
+    check : callable
+        The check callable.
+    value : `object`
+        The value to pass to check.
+    field : `lsst.pex.config.Field`
+        The field being checked.
+    config : `lsst.pex.config.Config` or `None`
+        The config holding the field, if known; used for the statistics key.
+
+    Returns
+    -------
+    result : `bool`
+        Return value of check(value).
+    """
+    if not _statsEnabled:
+        return check(value)
+    return callTimed("check", fieldKey(config, field) if config is not None else field.name, check, value)
+
+
+def instant(operation, **args):
+    """Report a point event to the listeners"""
+    if enabled:
+        for listener in list(_listeners):
+            listener.instant(operation, args)
+
+
+class _Span(object):
+    """Context manager recording the time spent in its body and reporting it
+    to the listeners
+    """
+
+    def __init__(self, operation, config, key, args):
+        self.operation = operation
+        self.config = config
+        self.key = key if key is not None or config is None else type(config).__name__
+        self.args = args
+        self.listeners = list(_listeners)
+
+    def __enter__(self):
+        for listener in self.listeners:
+            listener.begin(self.operation, self.config, self.args)
+        self.start = _now()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.operation, self.key, _now() - self.start)
+        for listener in reversed(self.listeners):
+            listener.end(self.operation, self.config, self.args)
+        return False
+
+
+class _NullSpan(object):
+    """Context manager that does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_nullSpan = _NullSpan()
+
+
+def timer(operation, config=None, key=None, **args):
+    """Return a context manager that records the time spent in its body
+
+    Parameters
+    ----------
+    operation : `str`
+        Name of the operation.
+    config : `lsst.pex.config.Config` or `None`
+        The config the operation applies to.
+    key : `str` or `None`
+        Statistics key; defaults to the class name of config.
+    **args
+        Extra information passed on to the listeners.
+
+    When instrumentation is off this returns a shared no-op context manager,
+    so it is only suitable for operations that are not called in tight loops;
+    hot paths should test 'enabled' directly.
+    """
+    if not enabled:
+        return _nullSpan
+    return _Span(operation, config, key, args)
@@ -24,25 +24,29 @@ from builtins import str
 from builtins import range
 
 import collections
+import weakref
 
-from .config import Field, FieldValidationError, _typeStr, _autocast, _joinNamePath
+from .config import Config, Field, FieldValidationError, _typeStr, _autocast, _joinNamePath, \
+    _notifyObservers, _isObserved, _FieldDoc, _dereference
 from .comparison import compareScalars, getComparisonName
 from .callStack import getCallStack, getStackFrame
+from . import instrumentation
 
 __all__ = ["ListField"]
 
 
 class List(collections.MutableSequence):
+    __slots__ = ("_field", "_configRef", "_history", "_list")
+    __doc__ = _FieldDoc(None)
+
     def __init__(self, config, field, value, at, label, setHistory=True):
         self._field = field
-        self._config = config
+        self._configRef = weakref.ref(config)
         self._history = self._config._history.setdefault(self._field.name, [])
         self._list = []
-        self.__doc__ = field.doc
         if value is not None:
             try:
-                for i, x in enumerate(value):
-                    self.insert(i, x, setHistory=False)
+                self._list = self._validateItems(value)
             except TypeError:
                 msg = "Value %s is of incorrect type %s. Sequence type expected" % (value, _typeStr(value))
                 raise FieldValidationError(self._field, self._config, msg)
@@ -56,10 +60,35 @@ class List(collections.MutableSequence):
                 (i, x, _typeStr(x), _typeStr(self._field.itemtype))
             raise FieldValidationError(self._field, self._config, msg)
 
-        if self._field.itemCheck is not None and not self._field.itemCheck(x):
+        if self._field.itemCheck is not None and \
+                not instrumentation.callCheck(self._field.itemCheck, x, self._field, self._config):
             msg = "Item at position %d is not a valid value: %s" % (i, x)
             raise FieldValidationError(self._field, self._config, msg)
 
+    def _validateItems(self, items, start=0, step=1):
+        """
+        Autocast and validate a batch of items in one pass, returning them as
+        a new list
+
+        start and step give the position of the first item and the spacing of
+        the rest, for error messages.
+        """
+        items = list(items)
+        itemtype = self._field.itemtype
+        itemCheck = self._field.itemCheck
+        if all(type(x) is itemtype for x in items):
+            # Fast path for the usual homogeneous batch: nothing to cast or type-check
+            if itemCheck is not None:
+                for j, x in enumerate(items):
+                    if not instrumentation.callCheck(itemCheck, x, self._field, self._config):
+                        msg = "Item at position %d is not a valid value: %s" % (start + j*step, x)
+                        raise FieldValidationError(self._field, self._config, msg)
+        else:
+            items = [_autocast(x, itemtype) for x in items]
+            for j, x in enumerate(items):
+                self.validateItem(start + j*step, x)
+        return items
+
     def list(self):
         return self._list
 
@@ -68,6 +97,9 @@ class List(collections.MutableSequence):
     """
     history = property(lambda x: x._history)
 
+    # held weakly, so that the Config and this do not form a reference cycle
+    _config = property(lambda x: _dereference(x._configRef, x))
+
     def __contains__(self, x):
         return x in self._list
 
@@ -80,20 +112,21 @@ class List(collections.MutableSequence):
                                        "Cannot modify a frozen Config")
         if isinstance(i, slice):
             k, stop, step = i.indices(len(self))
-            for j, xj in enumerate(x):
-                xj = _autocast(xj, self._field.itemtype)
-                self.validateItem(k, xj)
-                x[j] = xj
-                k += step
+            x = self._validateItems(x, k, step)
         else:
             x = _autocast(x, self._field.itemtype)
             self.validateItem(i, x)
 
+        observed = setHistory and Config._observerCount and _isObserved(self._config)
+        if observed:
+            old = list(self._list)
         self._list[i] = x
         if setHistory:
             if at is None:
                 at = getCallStack()
             self.history.append((list(self._list), at, label))
+        if observed:
+            _notifyObservers(self._config, self._field.name, old, list(self._list), label)
 
     def __getitem__(self, i):
         return self._list[i]
@@ -102,11 +135,16 @@ class List(collections.MutableSequence):
         if self._config._frozen:
             raise FieldValidationError(self._field, self._config,
                                        "Cannot modify a frozen Config")
+        observed = setHistory and Config._observerCount and _isObserved(self._config)
+        if observed:
+            old = list(self._list)
         del self._list[i]
         if setHistory:
             if at is None:
                 at = getCallStack()
             self.history.append((list(self._list), at, label))
+        if observed:
+            _notifyObservers(self._config, self._field.name, old, list(self._list), label)
 
     def __iter__(self):
         return iter(self._list)
@@ -116,6 +154,12 @@ class List(collections.MutableSequence):
             at = getCallStack()
         self.__setitem__(slice(i, i), [x], at=at, label=label, setHistory=setHistory)
 
+    def extend(self, values, at=None, label="extend", setHistory=True):
+        if at is None:
+            at = getCallStack()
+        end = len(self)
+        self.__setitem__(slice(end, end), values, at=at, label=label, setHistory=setHistory)
+
     def __repr__(self):
         return repr(self._list)
 
@@ -140,10 +184,7 @@ class List(collections.MutableSequence):
 
     def __setattr__(self, attr, value, at=None, label="assignment"):
         if hasattr(getattr(self.__class__, attr, None), '__set__'):
-            # This allows properties to work.
-            object.__setattr__(self, attr, value)
-        elif attr in self.__dict__ or attr in ["_field", "_config", "_history", "_list", "__doc__"]:
-            # This allows specific private attributes to work.
+            # This allows properties and the private attributes in __slots__ to work.
             object.__setattr__(self, attr, value)
         else:
             # We throw everything else.
@@ -165,10 +206,12 @@ class ListField(Field):
     Additionally users can provide two check functions:
     listCheck - used to validate the list as a whole, and
     itemCheck - used to validate each item individually
+
+    A defaultFactory may be given instead of a default, as for Field
     """
     def __init__(self, doc, dtype, default=None, optional=False,
                  listCheck=None, itemCheck=None,
-                 length=None, minLength=None, maxLength=None):
+                 length=None, minLength=None, maxLength=None, defaultFactory=None):
         if dtype not in Field.supportedTypes:
             raise ValueError("Unsupported dtype %s" % _typeStr(dtype))
         if length is not None:
@@ -190,7 +233,8 @@ class ListField(Field):
             raise ValueError("'itemCheck' must be callable")
 
         source = getStackFrame()
-        self._setup(doc=doc, dtype=List, default=default, check=None, optional=optional, source=source)
+        self._setup(doc=doc, dtype=List, default=default, check=None, optional=optional, source=source,
+                    defaultFactory=defaultFactory)
         self.listCheck = listCheck
         self.itemCheck = itemCheck
         self.itemtype = dtype
@@ -218,7 +262,8 @@ class ListField(Field):
             elif self.maxLength is not None and lenValue > self.maxLength:
                 msg = "Maximum allowed list length=%d, got length=%d" % (self.maxLength, lenValue)
                 raise FieldValidationError(self, instance, msg)
-            elif self.listCheck is not None and not self.listCheck(value):
+            elif self.listCheck is not None and \
+                    not instrumentation.callCheck(self.listCheck, value, self, instance):
                 msg = "%s is not a valid value" % str(value)
                 raise FieldValidationError(self, instance, msg)
 
@@ -235,12 +280,22 @@ class ListField(Field):
             history = instance._history.setdefault(self.name, [])
             history.append((value, at, label))
 
-        instance._storage[self.name] = value
+        if Config._observerCount and _isObserved(instance):
+            old = instance._storage.get(self.name)
+            instance._storage[self.name] = value
+            _notifyObservers(instance, self.name, list(old) if old is not None else None,
+                             list(value) if value is not None else None, label)
+        else:
+            instance._storage[self.name] = value
 
     def toDict(self, instance):
         value = self.__get__(instance)
         return list(value) if value is not None else None
 
+    def _snapshot(self, instance):
+        value = self.__get__(instance)
+        return tuple(value._list) if value is not None else None
+
     def _compare(self, instance1, instance2, shortcut, rtol, atol, output):
         """Helper function for Config.compare; used to compare two fields for equality.
 
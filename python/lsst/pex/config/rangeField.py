@@ -70,8 +70,8 @@ class RangeField(Field):
              ("]" if inclusiveMax else ")"))
         self.__doc__ += "\n\nValid Range = " + self.rangeString
 
-    def _validateValue(self, value):
-        Field._validateValue(self, value)
+    def _validateValue(self, value, instance=None):
+        Field._validateValue(self, value, instance)
         if not self.minCheck(value, self.min) or \
                 not self.maxCheck(value, self.max):
             msg = "%s is outside of valid range %s" % (value, self.rangeString)
@@ -23,8 +23,9 @@ from builtins import object
 
 import collections
 import copy
+import time
 
-from .config import Config, FieldValidationError, _typeStr
+from .config import Config, FieldValidationError, _typeStr, _FieldDoc
 from .configChoiceField import ConfigInstanceDict, ConfigChoiceField
 
 __all__ = ("Registry", "makeRegistry", "RegistryField", "registerConfig", "registerConfigurable")
@@ -122,8 +123,8 @@ class Registry(collections.Mapping):
     def __contains__(self, key):
         return key in self._dict
 
-    def makeField(self, doc, default=None, optional=False, multi=False):
-        return RegistryField(doc, self, default, optional, multi)
+    def makeField(self, doc, default=None, optional=False, multi=False, applyCache=None):
+        return RegistryField(doc, self, default, optional, multi, applyCache=applyCache)
 
 
 class RegistryAdaptor(collections.Mapping):
@@ -145,7 +146,25 @@ class RegistryAdaptor(collections.Mapping):
         return k in self.registry
 
 
+def _callTarget(name, target, config, timer, cache, args, kw):
+    """Call a registry target with its config, reporting the elapsed time to timer if not None
+
+    If cache is not None, it is an ApplyCache used to make the call.
+    """
+    start = time.time() if timer is not None else None
+    try:
+        if cache is not None:
+            return cache.call(target, config, args, kw)
+        return target(*args, config=config, **kw)
+    finally:
+        if timer is not None:
+            timer(name, time.time() - start)
+
+
 class RegistryInstanceDict(ConfigInstanceDict):
+    __slots__ = ("registry",)
+    __doc__ = _FieldDoc(None)
+
     def __init__(self, config, field):
         ConfigInstanceDict.__init__(self, config, field)
         self.registry = field.registry
@@ -171,18 +190,42 @@ class RegistryInstanceDict(ConfigInstanceDict):
         each active target with its corresponding active config.
 
         Additional arguments will be passed on to the configurable target(s)
+
+        If the field has an applyCache, previously built configurables may be returned.
+        """
+        return self._apply(None, None, args, kw)
+
+    def applyConcurrently(self, executor, args=(), kw=None, timer=None):
+        """Call the active target(s) as apply does, concurrently and/or timing each call
+
+        @param executor  an object with a submit(fn, *args, **kw) method returning futures
+                         (e.g. a concurrent.futures.ThreadPoolExecutor), or None; if provided
+                         and this is a multi-selection field, the selected targets are called
+                         concurrently. The returned list is always in selection order.
+        @param args      a sequence of positional arguments to pass on to the target(s)
+        @param kw        a dict of keyword arguments to pass on to the target(s), or None
+        @param timer     a callable timer(name, seconds), or None; called once per target with
+                         the registry name of the target and the wall-clock time spent calling it.
         """
+        return self._apply(executor, timer, tuple(args), dict(kw) if kw is not None else {})
+
+    def _apply(self, executor, timer, args, kw):
         if self.active is None:
             msg = "No selection has been made.  Options: %s" % \
                 (" ".join(list(self._field.typemap.registry.keys())))
             raise FieldValidationError(self._field, self._config, msg)
+        cache = self._field.applyCache
         if self._field.multi:
-            retvals = []
-            for c in self._selection:
-                retvals.append(self._field.typemap.registry[c](*args, config=self[c], **kw))
-            return retvals
+            calls = [(c, self._field.typemap.registry[c], self[c]) for c in self._selection]
+            if executor is None:
+                return [_callTarget(name, target, config, timer, cache, args, kw)
+                        for name, target, config in calls]
+            futures = [executor.submit(_callTarget, name, target, config, timer, cache, args, kw)
+                       for name, target, config in calls]
+            return [future.result() for future in futures]
         else:
-            return self._field.typemap.registry[self.name](*args, config=self[self.name], **kw)
+            return _callTarget(self.name, self._field.typemap.registry[self.name], self[self.name],
+                               timer, cache, args, kw)
 
     def __setattr__(self, attr, value):
         if attr == "registry":
@@ -194,9 +237,14 @@ class RegistryInstanceDict(ConfigInstanceDict):
 class RegistryField(ConfigChoiceField):
     instanceDictClass = RegistryInstanceDict
 
-    def __init__(self, doc, registry, default=None, optional=False, multi=False):
+    def __init__(self, doc, registry, default=None, optional=False, multi=False, applyCache=None):
+        """
+        @param applyCache  an optional ApplyCache used by apply() to reuse configurables
+                           built from identical frozen configs
+        """
         types = RegistryAdaptor(registry)
         self.registry = registry
+        self.applyCache = applyCache
         ConfigChoiceField.__init__(self, doc, types, default, optional, multi)
 
     def __deepcopy__(self, memo):
@@ -206,7 +254,7 @@ class RegistryField(ConfigChoiceField):
         """
         other = type(self)(doc=self.doc, registry=self.registry,
                            default=copy.deepcopy(self.default),
-                           optional=self.optional, multi=self.multi)
+                           optional=self.optional, multi=self.multi, applyCache=self.applyCache)
         other.source = self.source
         return other
 
@@ -0,0 +1,142 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import object
+
+import collections
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+
+from .config import _typeStr
+
+__all__ = ["SharedConfig", "publishConfig"]
+
+# Snapshots attached in this process: {token of the handle: snapshot}, least
+# recently attached first.  Worker processes are never told when a config is
+# unlinked, so only the last _maxAttached snapshots are kept; any other is
+# read again from its file if it is attached again.
+_attached = collections.OrderedDict()
+_maxAttached = 8
+_attachLock = threading.Lock()
+
+
+def _keepAttached(token, snapshot):
+    """Record snapshot as the most recently attached; call with _attachLock held"""
+    _attached.pop(token, None)
+    _attached[token] = snapshot
+    while len(_attached) > _maxAttached:
+        _attached.popitem(last=False)
+
+
+def publishConfig(config, dir=None):
+    """
+    Publish a frozen config for other processes, returning a SharedConfig
+    handle to it
+
+    The snapshot of the config (see Config.snapshot) is pickled once to a
+    file in dir if given, else in /dev/shm (a file system held in memory) if
+    it exists, else in the default temporary directory.
+
+    Pass the handle, which pickles to a few bytes, to the tasks of a process
+    pool in place of the config; each worker process reads and unpickles the
+    file the first time a task calls attach, and later tasks reuse the
+    snapshot. The publisher must call unlink (or use the handle as a context
+    manager) once the workers are done with it.
+    """
+    if not config._frozen:
+        raise ValueError("Only frozen configs can be published; %s is not frozen" % _typeStr(config))
+    if dir is None and os.path.isdir("/dev/shm"):
+        dir = "/dev/shm"
+    snapshot = config.snapshot()
+    fd, path = tempfile.mkstemp(prefix="pexConfig-", suffix=".snapshot", dir=dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(snapshot, f, pickle.HIGHEST_PROTOCOL)
+    except BaseException:
+        os.remove(path)
+        raise
+    handle = SharedConfig(path, uuid.uuid4().hex)
+    # the publisher need not read it back
+    with _attachLock:
+        _keepAttached(handle.token, snapshot)
+    return handle
+
+
+class SharedConfig(object):
+    """
+    Handle to a config published by publishConfig
+
+    Handles may be pickled and sent to other processes on the same host,
+    where attach returns the snapshot of the published config.  Snapshots
+    are kept per process by the token of the handle, which is unique to each
+    publication, so a temporary file path that is later reused cannot return
+    a stale snapshot.
+    """
+
+    def __init__(self, path, token):
+        self.path = path
+        self.token = token
+
+    def attach(self):
+        """
+        Return the snapshot of the published config, reading it from its
+        file the first time it is attached in this process (or if it has since
+        been dropped to make room for others)
+        """
+        with _attachLock:
+            snapshot = _attached.get(self.token)
+            if snapshot is None:
+                with open(self.path, "rb") as f:
+                    snapshot = pickle.load(f)
+            _keepAttached(self.token, snapshot)
+        return snapshot
+
+    def detach(self):
+        """
+        Forget the snapshot attached in this process, if any
+        """
+        with _attachLock:
+            _attached.pop(self.token, None)
+
+    def unlink(self):
+        """
+        Remove the published config; to be called by the publisher once no
+        more processes will attach it
+        """
+        self.detach()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+        return False
+
+    def __reduce__(self):
+        return (SharedConfig, (self.path, self.token))
+
+    def __repr__(self):
+        return "SharedConfig(%r, %r)" % (self.path, self.token)
@@ -0,0 +1,135 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+import collections
+
+__all__ = ["FrozenDict", "ChoiceSnapshot"]
+
+
+class FrozenDict(collections.Mapping):
+    """
+    A read-only, hashable mapping, holding the items of a DictField or
+    ConfigDictField in a Config snapshot
+    """
+    __slots__ = ("_dict",)
+
+    def __init__(self, items=()):
+        object.__setattr__(self, "_dict", dict(items))
+
+    def __getitem__(self, k):
+        return self._dict[k]
+
+    def __len__(self):
+        return len(self._dict)
+
+    def __iter__(self):
+        return iter(self._dict)
+
+    def __contains__(self, k):
+        return k in self._dict
+
+    def __hash__(self):
+        return hash(frozenset(self._dict.items()))
+
+    def __eq__(self, other):
+        if isinstance(other, FrozenDict):
+            other = other._dict
+        return self._dict == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError("%s is read-only" % type(self).__name__)
+
+    def __reduce__(self):
+        return (type(self), (self._dict,))
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self._dict)
+
+
+class ChoiceSnapshot(FrozenDict):
+    """
+    The value of a ConfigChoiceField or RegistryField in a Config snapshot
+
+    Maps each name to the snapshot of its config, and has the selection as
+    attributes: name (single selection) or names (a frozenset; multiple
+    selection) and active (the snapshot of the selected config, or a tuple of
+    the snapshots of the selected configs in sorted name order).
+    """
+    __slots__ = ("name", "names", "active")
+
+    def __init__(self, items, name=None, names=None):
+        FrozenDict.__init__(self, items)
+        if names is not None:
+            names = frozenset(names)
+            active = tuple(self._dict[k] for k in sorted(names))
+        else:
+            active = self._dict[name] if name is not None else None
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "names", names)
+        object.__setattr__(self, "active", active)
+
+    def __hash__(self):
+        return hash((FrozenDict.__hash__(self), self.name, self.names))
+
+    def __eq__(self, other):
+        return isinstance(other, ChoiceSnapshot) and self._dict == other._dict and \
+            self.name == other.name and self.names == other.names
+
+    def __reduce__(self):
+        return (ChoiceSnapshot, (self._dict, self.name, self.names))
+
+    def __repr__(self):
+        if self.names is not None:
+            return "ChoiceSnapshot(%r, names=%r)" % (self._dict, sorted(self.names))
+        return "ChoiceSnapshot(%r, name=%r)" % (self._dict, self.name)
+
+
+def getSnapshotClass(ConfigClass):
+    """
+    Return the class of the snapshots of instances of ConfigClass
+
+    This is a namedtuple with one attribute per field, in sorted order of the
+    field names, made the first time it is needed and kept on ConfigClass.
+    """
+    snapshotClass = ConfigClass.__dict__.get("_snapshotClass")
+    if snapshotClass is None:
+        base = collections.namedtuple(ConfigClass.__name__ + "Snapshot", sorted(ConfigClass._fields))
+        snapshotClass = type(base.__name__, (base,), {
+            "__slots__": (),
+            "__module__": ConfigClass.__module__,
+            "__doc__": "Immutable snapshot of a %s" % ConfigClass.__name__,
+            "_configClass": ConfigClass,
+            "__reduce__": _reduceSnapshot,
+        })
+        type.__setattr__(ConfigClass, "_snapshotClass", snapshotClass)
+    return snapshotClass
+
+
+def _reduceSnapshot(snapshot):
+    # The snapshot class is made on demand, so it is pickled by its ConfigClass
+    return (_unreduceSnapshot, (snapshot._configClass, tuple(snapshot)))
+
+
+def _unreduceSnapshot(ConfigClass, values):
+    return getSnapshotClass(ConfigClass)(*values)
@@ -0,0 +1,133 @@
+#
+# LSST Data Management System
+# Copyright 2017 AURA/LSST.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <https://www.lsstcorp.org/LegalNotices/>.
+#
+"""Timeline tracing of Config operations in Chrome trace event format
+
+Example:
+
+    with Tracer() as tracer:
+        config.load("overrides.py")
+        config.validate()
+    tracer.save("config.trace.json")
+
+The resulting file may be opened in chrome://tracing or another viewer of
+the Chrome trace event format.
+"""
+from __future__ import print_function, division, absolute_import
+
+__all__ = ("Tracer",)
+
+from builtins import object
+
+import json
+import os
+import threading
+
+from . import instrumentation
+
+
+def _configName(config):
+    """Return the dotted name of a config, or its class name if it has none"""
+    name = config._name
+    return name if name is not None else type(config).__name__
+
+
+class Tracer(object):
+    """Record spans of Config operations as Chrome trace events
+
+    Spans are recorded for loadFromStream (and so load and unpickling),
+    setDefaults, validate and saveToStream (and so save and pickling), each
+    named after the operation and the dotted name of the config; modules
+    imported while loading are recorded as instant events.  Spans nest in
+    the order the operations are called, so, for example, override files
+    loaded from other override files and the validation of sub-configs appear
+    inside the span that triggered them.
+
+    A Tracer records nothing until started, and only while it is started.
+    """
+
+    def __init__(self):
+        self.events = []
+        self._pid = os.getpid()
+        self._origin = instrumentation._now()
+
+    def start(self):
+        """Start recording events"""
+        instrumentation.addListener(self)
+        return self
+
+    def stop(self):
+        """Stop recording events; those already recorded are kept"""
+        instrumentation.removeListener(self)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+        return False
+
+    def _event(self, phase, name, args):
+        event = {
+            "cat": "pex_config",
+            "ph": phase,
+            "ts": 1e6*(instrumentation._now() - self._origin),
+            "pid": self._pid,
+            "tid": threading.current_thread().ident,
+        }
+        if name is not None:
+            event["name"] = name
+        if args:
+            event["args"] = args
+        return event
+
+    def begin(self, operation, config, args):
+        """Record the start of an operation; called by the instrumentation hooks"""
+        args = dict(args)
+        if config is not None:
+            args["config"] = _configName(config)
+            args["class"] = "%s.%s" % (type(config).__module__, type(config).__name__)
+            name = "%s %s" % (operation, args["config"])
+        else:
+            name = operation
+        self.events.append(self._event("B", name, args))
+
+    def end(self, operation, config, args):
+        """Record the end of an operation; called by the instrumentation hooks"""
+        self.events.append(self._event("E", None, None))
+
+    def instant(self, operation, args):
+        """Record a point event; called by the instrumentation hooks"""
+        name = operation
+        if "module" in args:
+            name = "%s %s" % (operation, args["module"])
+        event = self._event("i", name, dict(args))
+        event["s"] = "t"
+        self.events.append(event)
+
+    def toChromeTrace(self):
+        """Return the recorded events as a Chrome trace event JSON object"""
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def save(self, filename):
+        """Write the recorded events to a Chrome trace event JSON file"""
+        with open(filename, "w") as f:
+            json.dump(self.toChromeTrace(), f)
@@ -22,6 +22,7 @@
 from past.builtins import basestring
 
 import inspect
+import keyword
 import re
 import importlib
 
@@ -30,7 +31,7 @@ from .listField import ListField, List
 from .configField import ConfigField
 from .callStack import getCallerFrame, getCallStack
 
-__all__ = ("wrap", "makeConfigClass")
+__all__ = ("wrap", "makeConfigClass", "makeControls", "readControls")
 
 # Mapping from C++ types to Python type: assumes we can round-trip between these using
 # the usual pybind11 converters, but doesn't require they be binary equivalent under-the-hood
@@ -46,6 +47,8 @@ _dtypeMap = {
 
 _containerRegex = re.compile(r"(std::)?(vector|list)<\s*(?P<type>[a-z0-9_:]+)\s*>")
 
+_identifierRegex = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 
 def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=0, cls=None):
     """A function that creates a Python config class that matches a  C++ control object class.
@@ -176,26 +179,13 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=0, cls=None):
                         raise TypeError("Could not parse field type '%s'." % ctype)
                     fields[k] = FieldCls(doc=doc, dtype=dtype, optional=True)
 
+    # Generate straight-line functions that convert between Config and Control objects for this
+    # particular set of fields; see _makeConverters.
+    converters = _makeConverters(ctrl, fields)
+    defaultsCache = {}
+
     # Define a number of methods to put in the new Config class.  Note that these are "closures";
     # they have access to local variables defined in the makeConfigClass function (like the fields dict).
-    def makeControl(self):
-        """Construct a C++ Control object from this Config object.
-
-        Fields set to None will be ignored, and left at the values defined by the
-        Control object's default constructor.
-        """
-        r = self.Control()
-        for k, f in fields.items():
-            value = getattr(self, k)
-            if isinstance(f, ConfigField):
-                value = value.makeControl()
-            if value is not None:
-                if isinstance(value, List):
-                    setattr(r, k, value._list)
-                else:
-                    setattr(r, k, value)
-        return r
-
     def readControl(self, control, __at=None, __label="readControl", __reset=False):
         """Read values from a C++ Control object and assign them to self's fields.
 
@@ -204,16 +194,7 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=0, cls=None):
         """
         if __at is None:
             __at = getCallStack()
-        values = {}
-        for k, f in fields.items():
-            if isinstance(f, ConfigField):
-                getattr(self, k).readControl(getattr(control, k),
-                                             __at=__at, __label=__label, __reset=__reset)
-            else:
-                values[k] = getattr(control, k)
-        if __reset:
-            self._history = {}
-        self.update(__at=__at, __label=__label, **values)
+        self._applyControlValues(self._readControlValues(control), __at, __label, __reset)
 
     def validate(self):
         """Validate the config object by constructing a control object and using
@@ -222,21 +203,38 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=0, cls=None):
         r = self.makeControl()
         r.validate()
 
+    def getControlDefaults():
+        """Return the values of a default-constructed Control object, as returned by
+        _readControlValues; they are read only once per class.  Return None if the
+        Control cannot be instantiated.
+        """
+        if "values" not in defaultsCache:
+            try:
+                defaultsCache["values"] = converters["_readControlValues"](ctrl())
+            except Exception:
+                defaultsCache["values"] = None
+        return defaultsCache["values"]
+
     def setDefaults(self):
         """Initialize the config object, using the Control objects default ctor
         to provide defaults."""
         super(cls, self).setDefaults()
+        values = getControlDefaults()
+        if values is None:
+            return  # if we can't instantiate the Control, don't set defaults
         try:
-            r = self.Control()
             # Indicate in the history that these values came from C++, even if we can't say which line
-            self.readControl(r, __at=[(ctrl.__name__ + " C++", 0, "setDefaults", "")], __label="defaults",
-                             __reset=True)
+            self._applyControlValues(values, [(ctrl.__name__ + " C++", 0, "setDefaults", "")], "defaults",
+                                     True)
         except Exception:
-            pass  # if we can't instantiate the Control, don't set defaults
+            pass
 
     ctrl.ConfigClass = cls
     cls.Control = ctrl
-    cls.makeControl = makeControl
+    cls.makeControl = converters["makeControl"]
+    cls._readControlValues = staticmethod(converters["_readControlValues"])
+    cls._applyControlValues = converters["_applyControlValues"]
+    cls._controlKey = converters["_controlKey"]
     cls.readControl = readControl
     cls.setDefaults = setDefaults
     if hasattr(ctrl, "validate"):
@@ -247,6 +245,134 @@ def makeConfigClass(ctrl, name=None, base=Config, doc=None, module=0, cls=None):
     return cls
 
 
+def _makeConverters(ctrl, fields):
+    """Generate the functions that convert between a Config class and the Control class ctrl
+
+    @param ctrl    C++ control class being wrapped.
+    @param fields  dict of the fields generated for ctrl, keyed by name.
+
+    Returns a dict containing the functions:
+    - makeControl(self): construct a Control object from a Config object.
+    - _readControlValues(control): return a dict of the field values of a Control object,
+      with the values of nested Control objects as nested dicts, and lists copied.
+    - _applyControlValues(self, values, at, label, reset): set the fields of a Config object
+      from a dict returned by _readControlValues.
+
+    The function bodies are generated as straight-line code, one statement per field, so the
+    field types do not need to be inspected at each call.
+    """
+    namespace = {"List": List, "_makeNestedControl": _makeNestedControl, "_listKey": _listKey}
+    makeControl = ["def makeControl(self, _memo=None):",
+                   '    """Construct a C++ Control object from this Config object.',
+                   "",
+                   "    Fields set to None will be ignored, and left at the values defined by the",
+                   "    Control object's default constructor.",
+                   "",
+                   "    The _memo argument is for internal use by makeControls only.",
+                   '    """',
+                   "    r = self.Control()"]
+    controlKey = []
+    readValues = ["def _readControlValues(control):",
+                  "    values = {}"]
+    applyValues = ["def _applyControlValues(self, values, at, label, reset):"]
+    updateArgs = ["'__at': at", "'__label': label"]
+    for i, k in enumerate(sorted(fields)):
+        plainName = _identifierRegex.match(k) and not keyword.iskeyword(k)
+        if plainName:
+            selfAttr, controlAttr = "self.%s" % k, "control.%s" % k
+        else:
+            selfAttr, controlAttr = "getattr(self, %r)" % k, "getattr(control, %r)" % k
+        if isinstance(fields[k], ConfigField):
+            nested = "_readNested%d" % i
+            namespace[nested] = fields[k].dtype._readControlValues
+            makeControl.append("    value = _makeNestedControl(%s, _memo)" % selfAttr)
+            controlKey.append("%s._controlKey()" % selfAttr)
+            readValues.append("    values[%r] = %s(%s)" % (k, nested, controlAttr))
+            applyValues.append("    %s._applyControlValues(values[%r], at, label, reset)" % (selfAttr, k))
+        else:
+            makeControl.append("    value = %s" % selfAttr)
+            if isinstance(fields[k], ListField):
+                makeControl.append("    if isinstance(value, List):")
+                makeControl.append("        value = value._list")
+                readValues.append("    values[%r] = list(%s)" % (k, controlAttr))
+                controlKey.append("_listKey(%s)" % selfAttr)
+            else:
+                readValues.append("    values[%r] = %s" % (k, controlAttr))
+                controlKey.append(selfAttr)
+            updateArgs.append("%r: values[%r]" % (k, k))
+        makeControl.append("    if value is not None:")
+        if plainName:
+            makeControl.append("        r.%s = value" % k)
+        else:
+            makeControl.append("        setattr(r, %r, value)" % k)
+    makeControl.append("    return r")
+    readValues.append("    return values")
+    applyValues.append("    if reset:")
+    applyValues.append("        self._history = {}")
+    applyValues.append("    self.update(**{%s})" % ", ".join(updateArgs))
+
+    keyValues = ["def _controlKey(self):",
+                 "    return (%s)" % "".join("%s, " % v for v in controlKey)]
+
+    source = "\n".join(makeControl + [""] + readValues + [""] + applyValues + [""] + keyValues) + "\n"
+    code = compile(source, "<generated converters for %s>" % ctrl.__name__, "exec")
+    exec(code, namespace)
+    return dict((name, namespace[name]) for name in ("makeControl", "_readControlValues",
+                                                     "_applyControlValues", "_controlKey"))
+
+
+def _listKey(value):
+    """Return a hashable equivalent of the value of a ListField, for use in _controlKey
+    """
+    return tuple(value) if value is not None else None
+
+
+def _makeNestedControl(config, memo):
+    """Return config.makeControl(memo); if memo is not None and config is frozen, reuse the
+    Control object made for an identical config, if there is one in memo.
+
+    This is safe because nested Control objects are copied into their parent.
+    """
+    if memo is None or not config._frozen:
+        return config.makeControl(memo)
+    key = (type(config), config._controlKey())
+    control = memo.get(key)
+    if control is None:
+        control = memo[key] = config.makeControl(memo)
+    return control
+
+
+def makeControls(configs):
+    """Construct a list of C++ Control objects from a sequence of Config objects
+
+    The configs must be instances of classes created by makeConfigClass or wrap.  This is
+    equivalent to [config.makeControl() for config in configs], but nested Control objects are
+    only converted once for each distinct frozen sub-config in the batch.
+    """
+    memo = {}
+    return [config.makeControl(memo) for config in configs]
+
+
+def readControls(controls, ConfigClass=None):
+    """Construct a list of Config objects from a sequence of C++ Control objects
+
+    @param controls     sequence of Control objects.
+    @param ConfigClass  Config class to construct; if None, the ConfigClass attribute of the type
+                        of each Control object (as set by makeConfigClass) is used.
+
+    The call stack recorded in the history of the new configs is captured only once for the
+    whole batch.
+    """
+    at = getCallStack()
+    configs = []
+    for control in controls:
+        configClass = ConfigClass if ConfigClass is not None else type(control).ConfigClass
+        config = configClass(__at=at)
+        config._applyControlValues(config._readControlValues(control), at, "readControls", False)
+        configs.append(config)
+    return configs
+
+
 def wrap(ctrl):
     """A decorator that adds fields from a C++ control class to a Python config class.
 
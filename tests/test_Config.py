@@ -24,13 +24,19 @@
 from builtins import object
 from past.builtins import unicode
 
+import gc
 import io
 import itertools
+import json
 import re
 import os
+import threading
 import unittest
+import warnings
+import weakref
 import lsst.utils.tests
 import lsst.pex.config as pexConfig
+import lsst.pex.config.config
 import pickle
 
 GLOBAL_REGISTRY = {}
@@ -289,6 +295,61 @@ class ConfigTest(unittest.TestCase):
         self.assertEqual(III.a.default, 5)
         self.assertEqual(AAA.a.default, 4)
 
+    def testInheritedFields(self):
+        class AAA(pexConfig.Config):
+            a = pexConfig.Field("AAA.a", int, default=4)
+            b = pexConfig.Field("AAA.b", int, default=1)
+
+        aField = AAA.a
+
+        class BBB(AAA):
+            b = pexConfig.Field("BBB.b", int, default=2)
+
+        class CCC(AAA):
+            pass
+
+        class DDD(BBB, CCC):
+            pass
+
+        # every class has its own copy of the fields it inherits
+        self.assertIsNot(BBB._fields["a"], AAA._fields["a"])
+        self.assertIsNot(DDD._fields["a"], BBB._fields["a"])
+        # fields are resolved in MRO order
+        self.assertEqual(DDD().b, 2)
+
+        # modifying a base class field does not affect existing subclasses,
+        # however the field was obtained
+        aField.default = 5
+        self.assertEqual(AAA().a, 5)
+        self.assertEqual(BBB().a, 4)
+        self.assertEqual(DDD().a, 4)
+        AAA._fields["a"].default = 7
+        self.assertEqual(AAA().a, 7)
+        self.assertEqual(CCC().a, 4)
+
+        # nor does modifying a subclass field affect its base classes
+        BBB.a.default = 6
+        self.assertEqual(BBB().a, 6)
+        self.assertEqual(AAA().a, 7)
+        self.assertEqual(DDD().a, 4)
+
+        # a Field bound to two names is not shared between them
+        class EEE(pexConfig.Config):
+            x = y = pexConfig.Field("EEE.x", int, default=0)
+        self.assertIsNot(EEE._fields["x"], EEE._fields["y"])
+        self.assertEqual(set((EEE.x.name, EEE.y.name)), set(("x", "y")))
+
+        # copies share only the attributes that cannot be modified in place
+        class FFF(pexConfig.Config):
+            c = pexConfig.ChoiceField("FFF.c", str, allowed={"a": "A"}, default="a")
+
+        class GGG(FFF):
+            pass
+
+        self.assertIs(GGG.c.source, FFF.c.source)
+        GGG.c.allowed["b"] = "B"
+        self.assertNotIn("b", FFF.c.allowed)
+
     def testConvert(self):
         pol = pexConfig.makePolicy(self.simple)
         self.assertEqual(pol.exists("i"), False)
@@ -310,6 +371,204 @@ class ConfigTest(unittest.TestCase):
         ps = pexConfig.makePropertySet(self.comp)
         self.assertEqual(ps.get("c.f"), self.comp.c.f)
 
+        # empty containers and sub-configs become empty sub-policies
+        class Empty(pexConfig.Config):
+            pass
+
+        class HasEmpty(pexConfig.Config):
+            d = pexConfig.DictField("d", keytype=str, itemtype=int, default={})
+            cd = pexConfig.ConfigDictField("cd", keytype=str, itemtype=InnerConfig, default={})
+            e = pexConfig.ConfigField("e", Empty)
+            x = pexConfig.Field("x", int, default=1)
+
+        config = HasEmpty()
+        self.assertEqual(dict(config.iterLeaves()), {"d": {}, "cd": {}, "e": {}, "x": 1})
+        pol = pexConfig.makePolicy(config)
+        for name in ("d", "cd", "e"):
+            self.assertTrue(pol.isPolicy(name))
+        self.assertEqual(pol.get("x"), 1)
+        ps = pexConfig.makePropertySet(config)
+        self.assertEqual([name for name in ("d", "cd", "e", "x") if ps.exists(name)], ["x"])
+        config.d["a"] = 2
+        self.assertEqual(pexConfig.makePolicy(config).get("d.a"), 2)
+
+    def testIterLeaves(self):
+        def flatten(prefix, d, out):
+            for k, v in d.items():
+                name = k if prefix is None else prefix + "." + k
+                if isinstance(v, dict) and v:
+                    flatten(name, v, out)
+                else:
+                    out[name] = v
+            return out
+
+        for config in (self.simple, self.outer, self.comp):
+            leaves = list(config.iterLeaves())
+            self.assertEqual(dict(leaves), flatten(None, config.toDict(), {}))
+            self.assertEqual(len(leaves), len(dict(leaves)))
+        self.assertIn(("c.f", self.comp.c.f), list(self.comp.iterLeaves()))
+        self.assertIn(("r.values.AAA.ll", [1, 2, 3]), list(self.comp.iterLeaves()))
+        self.assertIn(("top.c.f", self.comp.c.f), list(self.comp.iterLeaves("top")))
+
+    def testLeafSinks(self):
+        flat = pexConfig.exportLeaves(self.comp, pexConfig.FlatDictSink())
+        self.assertEqual(flat, dict(self.comp.iterLeaves()))
+        self.assertIsNone(flat["r.values.AAA.i"])
+
+        stream = io.StringIO()
+        self.assertIsNone(pexConfig.exportLeaves(self.simple, pexConfig.JsonLinesSink(stream)))
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(len(lines), len(self.simple.toDict()) + len(self.simple.d) - 1)
+        self.assertIn({"name": "d.key", "value": "value"}, lines)
+        self.assertIn({"name": "ll", "value": [1, 2, 3]}, lines)
+
+    def testDefaultFactory(self):
+        calls = []
+
+        def makeTable():
+            calls.append("table")
+            return list(range(5))
+
+        class LazyConfig(pexConfig.Config):
+            table = pexConfig.ListField("lazy list", int, defaultFactory=makeTable)
+            scale = pexConfig.Field("lazy scalar", float, defaultFactory=lambda: 2)
+            lookup = pexConfig.DictField("lazy dict", str, int, defaultFactory=lambda: {"a": 1})
+            inner = pexConfig.ConfigField("inner", InnerConfig)
+
+        self.assertRaises(ValueError, pexConfig.Field, "both", int, default=1, defaultFactory=lambda: 1)
+        self.assertRaises(ValueError, pexConfig.Field, "uncallable", int, defaultFactory=1)
+        self.assertIn("computed by ``makeTable``", LazyConfig.table.__doc__)
+
+        config = LazyConfig()
+        self.assertEqual(calls, [])
+        self.assertEqual(config.history["table"], [])
+        self.assertEqual(config.table, [0, 1, 2, 3, 4])
+        self.assertEqual(config.table, [0, 1, 2, 3, 4])
+        self.assertEqual(calls, ["table"])
+        history = config.history["table"]
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0][2], "default")
+        self.assertEqual(history[0][1][-2].function, "testDefaultFactory")
+        self.assertIsInstance(config.scale, float)
+        self.assertEqual(config.toDict()["lookup"], {"a": 1})
+
+        # defaults are also computed when all values are needed
+        config2 = LazyConfig()
+        self.assertIn("scale", config2)
+        self.assertEqual(sorted(config2.keys()), sorted(LazyConfig._fields.keys()))
+        self.assertEqual(len(calls), 2)
+        config3 = LazyConfig()
+        config3.freeze()
+        self.assertEqual(config3.table, [0, 1, 2, 3, 4])
+        self.assertEqual(len(calls), 3)
+
+        class HolderConfig(pexConfig.Config):
+            lazy = pexConfig.ConfigField("holder", LazyConfig)
+
+        holder = HolderConfig()
+        holder.lazy.scale = 5.0
+        holder.lazy = LazyConfig()
+        self.assertEqual(holder.lazy.scale, 2.0)
+
+        # values set before the first read replace the default
+        calls[:] = []
+        config4 = LazyConfig(table=[7])
+        config4.scale = 1.0
+        self.assertEqual(config4.table, [7])
+        self.assertEqual(calls, [])
+
+    def testResetToDefaults(self):
+        constructed = []
+
+        class CountedConfig(pexConfig.Config):
+            f = pexConfig.Field("f", float, default=1.0)
+            ll = pexConfig.ListField("ll", int, default=[1, 2])
+            lazy = pexConfig.Field("lazy", int, defaultFactory=lambda: 3)
+
+            def __new__(cls, *args, **kw):
+                constructed.append(cls)
+                return pexConfig.Config.__new__(cls, *args, **kw)
+
+            def setDefaults(self):
+                self.ll.append(3)
+
+        class HolderConfig(pexConfig.Config):
+            c = pexConfig.ConfigField("c", CountedConfig)
+            d = pexConfig.ConfigDictField("d", str, CountedConfig, default={})
+            r = pexConfig.ConfigChoiceField("r", {"a": CountedConfig}, default="a")
+
+        holder = HolderConfig()
+        holder.d["x"] = CountedConfig
+        holder.r["a"].f = 0.0
+        for sub in (holder.c, holder.d["x"], holder.r["a"]):
+            sub.update(f=2.0, ll=[4], lazy=5)
+        del constructed[:]
+
+        holder.c = CountedConfig
+        holder.d["x"] = CountedConfig
+        holder.r["a"] = CountedConfig
+        self.assertEqual(constructed, [])
+        for sub in (holder.c, holder.d["x"], holder.r["a"]):
+            self.assertEqual(sub.f, 1.0)
+            self.assertEqual(sub.ll, [1, 2, 3])
+            self.assertEqual(sub.lazy, 3)
+            self.assertEqual(sub.history["f"][-1][0], 1.0)
+
+        # configs that override __init__ are still constructed
+        class InitConfig(pexConfig.Config):
+            f = pexConfig.Field("f", float, default=1.0)
+
+            def __init__(self, **kw):
+                pexConfig.Config.__init__(self)
+                self.f = 5.0
+
+        class InitHolderConfig(pexConfig.Config):
+            c = pexConfig.ConfigField("c", InitConfig)
+
+        initHolder = InitHolderConfig()
+        initHolder.c.f = 7.0
+        initHolder.c = InitConfig
+        self.assertEqual(initHolder.c.f, 5.0)
+
+    def testResetNestedToDefaults(self):
+        def target1(config):
+            return 1
+
+        def target2(config):
+            return 2
+
+        class OtherConfig(pexConfig.Config):
+            g = pexConfig.Field("g", int, default=0)
+
+        class NestedConfig(pexConfig.Config):
+            r = pexConfig.ConfigChoiceField("r", {"a": InnerConfig, "b": InnerConfig}, default="a")
+            t = pexConfig.ConfigurableField("t", target=target1, ConfigClass=InnerConfig)
+
+        class HolderConfig(pexConfig.Config):
+            n = pexConfig.ConfigField("n", NestedConfig)
+
+        holder = HolderConfig()
+        holder.n.r["a"].f = 5.0
+        holder.n.r["b"].f = 6.0
+        holder.n.r.name = "b"
+        holder.n.t.f = 7.0
+        holder.n = NestedConfig
+        self.assertEqual(holder.n.r["a"].f, 0.0)
+        self.assertEqual(holder.n.r["b"].f, 0.0)
+        self.assertEqual(holder.n.r.name, "a")
+        self.assertEqual(holder.n.t.f, 0.0)
+
+        # the default target and ConfigClass are restored
+        holder.n.t.retarget(target2, OtherConfig)
+        holder.n.t.g = 3
+        holder.n = NestedConfig
+        self.assertIs(holder.n.t.target, target1)
+        self.assertIs(holder.n.t.ConfigClass, InnerConfig)
+        self.assertEqual(holder.n.t.f, 0.0)
+        holder.n.t.retarget(target2, InnerConfig)
+        holder.n = NestedConfig
+        self.assertIs(holder.n.t.target, target1)
+
     def testFreeze(self):
         self.comp.freeze()
 
@@ -318,6 +577,135 @@ class ConfigTest(unittest.TestCase):
         self.assertRaises(pexConfig.FieldValidationError, setattr, self.comp, "p", "AAA")
         self.assertRaises(pexConfig.FieldValidationError, setattr, self.comp.p["AAA"], "f", 5.0)
 
+    def testSlots(self):
+        for obj in (self.simple, self.simple.ll, self.simple.d, self.comp, self.comp.c, self.comp.r):
+            self.assertFalse(hasattr(obj, "__dict__"), "%r has a __dict__" % (obj,))
+        self.assertEqual(self.simple.ll.__doc__, "list test")
+        self.assertEqual(self.comp.r.__doc__, "a registry field")
+        self.assertIn("Emulates a dict", type(self.simple.d).__doc__)
+
+        self.assertRaises(AttributeError, setattr, self.simple, "undefined", 1)
+        self.assertRaises(pexConfig.FieldValidationError, setattr, self.simple.d, "undefined", 1)
+        self.assertRaises(pexConfig.FieldValidationError, setattr, self.comp.r, "undefined", 1)
+
+    def testNames(self):
+        class Holder(pexConfig.Config):
+            comp = pexConfig.ConfigField("complex", Complex)
+
+        holder = Holder()
+        self.assertIsNone(holder._name)
+        self.assertEqual(holder.comp._name, "comp")
+        self.assertEqual(holder.comp.c._name, "comp.c")
+        self.assertEqual(holder.comp.r["BBB"]._name, "comp.r['BBB']")
+        with self.assertRaises(pexConfig.FieldValidationError) as cm:
+            holder.comp.r["BBB"].f = -1.0
+        self.assertEqual(cm.exception.fullname, "comp.r['BBB'].f")
+
+        # saving a sub-config names it as the root only while saving
+        stream = io.StringIO()
+        holder.comp.saveToStream(stream, root="root")
+        self.assertIn("root.c.f=", stream.getvalue())
+        self.assertIn("root.r['BBB'].f=", stream.getvalue())
+        self.assertEqual(holder.comp.r["BBB"]._name, "comp.r['BBB']")
+        stream = io.StringIO()
+        holder.saveToStream(stream)
+        self.assertIn("config.comp.c.f=", stream.getvalue())
+        self.assertEqual(holder.comp.c._name, "comp.c")
+
+        # the root name is only seen by the thread saving the config
+        seen = []
+        with lsst.pex.config.config._namedAsRoot(holder.comp, "root"):
+            self.assertEqual(holder.comp.c._name, "root.c")
+            thread = threading.Thread(target=lambda: seen.append(holder.comp.c._name))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, ["comp.c"])
+
+        # so the same config may be saved by several threads at once
+        def save(root, results):
+            for i in range(20):
+                stream = io.StringIO()
+                holder.comp.saveToStream(stream, root=root)
+                results.append(stream.getvalue())
+
+        results = dict((root, []) for root in ("a", "b", "c", "d"))
+        threads = [threading.Thread(target=save, args=item) for item in results.items()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for root, saved in results.items():
+            self.assertEqual(len(saved), 20)
+            for text in saved:
+                names = set(re.findall(r"^(\w+)\.", text, re.MULTILINE))
+                self.assertEqual(names, set([root]))
+        self.assertEqual(holder.comp._name, "comp")
+        self.assertEqual(holder.comp.r["BBB"]._name, "comp.r['BBB']")
+
+        # sub-configs may also be given their full name, as Field types used to do
+        sub = InnerConfig(__name="comp.c", __parent=holder.comp)
+        self.assertEqual(sub._name, "comp.c")
+        sub = InnerConfig(__name="c", __parent=holder.comp)
+        self.assertEqual(sub._name, "comp.c")
+
+        # Field types relying on the removed rename hook are reported
+        class RenamedField(pexConfig.ConfigField):
+            def rename(self, instance):
+                pass
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+
+            class RenamedHolder(pexConfig.Config):
+                sub = RenamedField("sub", InnerConfig)
+        self.assertEqual([w.category for w in caught], [DeprecationWarning])
+        self.assertIn("RenamedField.rename", str(caught[0].message))
+
+    def testNoReferenceCycles(self):
+        class Target(object):
+            ConfigClass = InnerConfig
+
+            def __init__(self, config):
+                self.config = config
+
+        registry = pexConfig.makeRegistry("registry for testNoReferenceCycles")
+        registry.register("inner", Target)
+
+        class TreeConfig(pexConfig.Config):
+            simple = pexConfig.ConfigField("simple", Simple)
+            comp = pexConfig.ConfigField("complex", Complex)
+            multi = pexConfig.ConfigChoiceField("multi", typemap=GLOBAL_REGISTRY, multi=True)
+            reg = registry.makeField("registry", default="inner")
+            dct = pexConfig.ConfigDictField("dict", str, InnerConfig, default={})
+            target = pexConfig.ConfigurableField("configurable", target=Target)
+
+        enabled = gc.isenabled()
+        gc.collect()
+        gc.disable()
+        try:
+            config = TreeConfig()
+            config.multi.names = ["AAA", "BBB"]
+            config.dct = {"a": InnerConfig()}
+            config.target.f = 1.0
+            config.freeze()
+            ref = weakref.ref(config)
+            del config
+            self.assertIsNone(ref())
+            self.assertEqual(gc.collect(), 0)
+        finally:
+            if enabled:
+                gc.enable()
+
+        # containers outliving their config can be read, but not modified
+        ll = Simple().ll
+        self.assertEqual(list(ll), [1, 2, 3])
+        self.assertRaises(ReferenceError, ll.append, 4)
+        d = Simple().d
+        self.assertEqual(d["key"], "value")
+        self.assertRaises(ReferenceError, d.__setitem__, "key", "value2")
+        multi = TreeConfig().multi
+        self.assertRaises(ReferenceError, setattr, multi, "names", ["AAA"])
+
     def checkImportRoundTrip(self, importStatement, searchString, shouldBeThere):
         self.comp.c.f = 5.
 
@@ -365,6 +753,15 @@ except ImportError:
         self.assertIsInstance(comp, Complex)
         self.assertEqual(self.comp.c.f, comp.c.f)
 
+        # the payload of a frozen config is made once
+        self.assertIsNone(self.comp._saved)
+        self.comp.freeze()
+        payload = self.comp.__reduce__()[1][1]
+        self.assertIs(self.comp.__reduce__()[1][1], payload)
+        comp = pickle.loads(pickle.dumps(self.comp))
+        self.assertEqual(self.comp.c.f, comp.c.f)
+        self.assertFalse(comp._frozen)
+
     def testCompare(self):
         comp2 = Complex()
         inner2 = InnerConfig()
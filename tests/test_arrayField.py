@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import io
+import pickle
+import unittest
+
+import numpy as np
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+
+
+class Config1(pexConfig.Config):
+    weights = pexConfig.ArrayField("weights", float, default=[1.0, 2.0, 3.0], min=0.0, maxLength=5)
+    counts = pexConfig.ArrayField("counts", np.int32, length=3, default=[1, 2, 3],
+                                  check=lambda a: a[1:] >= a[:-1])
+    matrix = pexConfig.ArrayField("matrix", float, shape=(None, 2), default=None, optional=True)
+    required = pexConfig.ArrayField("required", float, default=None)
+
+
+class ComplexConfig(pexConfig.Config):
+    z = pexConfig.ArrayField("z", complex, default=[1 + 2j])
+
+
+class NarrowConfig(pexConfig.Config):
+    small = pexConfig.ArrayField("small", np.int8, default=[1])
+    single = pexConfig.ArrayField("single", np.float32, default=[1.0])
+    unsigned = pexConfig.ArrayField("unsigned", np.uint16, default=[1])
+
+
+class ArrayFieldTest(unittest.TestCase):
+
+    def testConstructor(self):
+        self.assertRaises(ValueError, pexConfig.ArrayField, "...", str)
+        self.assertRaises(ValueError, pexConfig.ArrayField, "...", float, minLength=4, maxLength=2)
+        self.assertRaises(ValueError, pexConfig.ArrayField, "...", float, length=-1)
+        self.assertRaises(ValueError, pexConfig.ArrayField, "...", float, shape=(2,), length=2)
+        self.assertRaises(ValueError, pexConfig.ArrayField, "...", float, min=2, max=1)
+
+    def testAssignment(self):
+        c = Config1()
+        self.assertIsInstance(c.weights, np.ndarray)
+        self.assertEqual(c.weights.dtype, np.float64)
+        self.assertEqual(c.counts.dtype, np.int32)
+
+        source = np.arange(4, dtype=np.int64)
+        c.weights = source
+        source[0] = 5
+        self.assertEqual(c.weights[0], 0.0)
+        self.assertFalse(c.weights.flags.writeable)
+        self.assertIs(c.weights, c.weights)
+        with self.assertRaises(ValueError):
+            c.weights[0] = 1.0
+
+        c.matrix = [[1, 2], [3, 4], [5, 6]]
+        self.assertEqual(c.matrix.shape, (3, 2))
+
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "counts", [1.5, 2, 3])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", ["a"])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", np.zeros(6))
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", [[1.0]])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", [1.0, -1.0])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", [np.nan])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "counts", [1, 2])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "counts", [3, 2, 1])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "matrix", [[1, 2, 3]])
+        self.assertEqual(list(c.weights), [0.0, 1.0, 2.0, 3.0])
+
+        self.assertRaises(pexConfig.FieldValidationError, c.validate)
+        c.required = []
+        c.validate()
+        c.freeze()
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "weights", [1.0])
+
+    def testHistory(self):
+        c = Config1()
+        c.weights = [4.0]
+        c.weights = [5.0]
+        history = c.history["weights"]
+        self.assertEqual([list(value) for value, at, label in history], [[1.0, 2.0, 3.0], [4.0], [5.0]])
+        self.assertIs(history[-1][0], c.weights)
+
+    def testSave(self):
+        c = Config1()
+        c.weights = [0.5, np.inf]
+        c.matrix = [[1, 2], [3, 4]]
+        c.required = [np.nan]
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        self.assertNotIn("numpy", stream.getvalue())
+
+        c2 = Config1()
+        c2.loadFromStream(stream.getvalue())
+        self.assertEqual(c, c2)
+        self.assertTrue(c.compare(c2))
+        self.assertEqual(c2.matrix.tolist(), [[1.0, 2.0], [3.0, 4.0]])
+        self.assertEqual(c.toDict()["counts"], [1, 2, 3])
+
+        c3 = pickle.loads(pickle.dumps(c))
+        self.assertEqual(c, c3)
+
+    def testNarrowDtypes(self):
+        c = NarrowConfig()
+        # values that do not fit are rejected, not wrapped or overflowed
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "small", [1000, 3])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "single", [1e300])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "unsigned", [-1])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "unsigned", [70000])
+        self.assertRaises(pexConfig.FieldValidationError, setattr, c, "unsigned", [1.5])
+        c.small = [-128, 127]
+        c.single = [0.1, np.inf, np.nan]
+        self.assertEqual(c.single.dtype, np.float32)
+        self.assertEqual(c.single[0], np.float32(0.1))
+
+        # integers may be set in unsigned fields, and round-trip
+        self.assertEqual(c.unsigned.dtype, np.uint16)
+        c.unsigned = [0, 65535]
+        self.assertEqual(c.unsigned.tolist(), [0, 65535])
+        c.validate()
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        c2 = NarrowConfig()
+        c2.loadFromStream(stream.getvalue())
+        self.assertEqual(c2.unsigned.dtype, np.uint16)
+        self.assertEqual(c, c2)
+
+    def testSaveComplex(self):
+        c = ComplexConfig()
+        c.z = [complex(1, np.inf), complex(-np.inf, 0.5), complex(np.nan, 2), 3j]
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        c2 = ComplexConfig()
+        c2.loadFromStream(stream.getvalue())
+        self.assertEqual(c2.z.dtype, c.z.dtype)
+        self.assertEqual(c, c2)
+        self.assertEqual(c2.z[0], complex(1, np.inf))
+        self.assertEqual(c2.z[3], 3j)
+
+    def testCompare(self):
+        c1 = Config1()
+        c2 = Config1()
+        self.assertEqual(c1, c2)
+        self.assertTrue(c1.compare(c2))
+
+        c2.weights = [1.0, 2.0, 3.0 + 1e-12]
+        self.assertNotEqual(c1, c2)
+        self.assertTrue(c1.compare(c2))
+
+        output = []
+        c2.weights = [1.0, 2.5, 3.0]
+        self.assertFalse(c1.compare(c2, output=output.append))
+        self.assertEqual(len(output), 1)
+        self.assertIn("1 elements differ", output[0])
+
+        c2.weights = [1.0]
+        self.assertNotEqual(c1, c2)
+        self.assertFalse(c1.compare(c2))
+
+        c1.matrix = [[1, 2]]
+        self.assertNotEqual(c1, c2)
+        self.assertFalse(c1.compare(c2))
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
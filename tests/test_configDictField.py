@@ -21,7 +21,10 @@
 # the GNU General Public License along with this program.  If not,
 # see <http://www.lsstcorp.org/LegalNotices/>.
 #
+import io
 import os
+import pickle
+import threading
 import unittest
 import lsst.utils.tests
 import lsst.pex.config as pexConfig
@@ -39,6 +42,10 @@ class Config3(pexConfig.Config):
     field1 = pexConfig.ConfigDictField(keytype=str, itemtype=pexConfig.Config, default={}, doc='doc')
 
 
+class Config4(pexConfig.Config):
+    d1 = pexConfig.ConfigDictField("d1", keytype=int, itemtype=Config1, default={}, lazy=True)
+
+
 class ConfigDictFieldTest(unittest.TestCase):
     def testConstructor(self):
         try:
@@ -98,6 +105,22 @@ class ConfigDictFieldTest(unittest.TestCase):
         c.d1["a"] = Config1(f=4)
         self.assertEqual(c.d1["a"].f, 4)
 
+    def testUpdate(self):
+        c = Config2(d1={"a": Config1(f=4)})
+        history = c.d1.history
+        self.assertEqual(len(history), 2)
+        c.d1.update({"a": Config1(f=5), "b": Config1})
+        self.assertEqual(c.d1["a"].f, 5)
+        self.assertEqual(c.d1["b"].f, 3)
+        self.assertEqual(c.d1["b"]._name, "d1['b']")
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history[-1][0], "Updated items at keys a, b")
+
+        # a bad key or item rejects the whole update
+        self.assertRaises(pexConfig.FieldValidationError, c.d1.update, {"c": Config1, "d": 0})
+        self.assertNotIn("c", c.d1)
+        self.assertEqual(len(history), 3)
+
     def testSave(self):
         c = Config2(d1={"a": Config1(f=4)})
         c.save("configDictTest.py")
@@ -115,6 +138,83 @@ class ConfigDictFieldTest(unittest.TestCase):
 
         self.assertEqual(rt.d1, None)
 
+    def testLazy(self):
+        c = Config4()
+        for k in range(5):
+            c.d1[k] = Config1(f=k)
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        self.assertIn("_addLazyItems", stream.getvalue())
+
+        rt = Config4()
+        rt.loadFromStream(stream.getvalue())
+        self.assertEqual(len(rt.d1), 5)
+        self.assertEqual(rt.d1._dict, {})
+        self.assertIn(3, rt.d1)
+        self.assertEqual(sorted(rt.d1), list(range(5)))
+        self.assertEqual(rt.d1[3].f, 3.0)
+        self.assertEqual(rt.d1[3]._name, "d1[3]")
+        self.assertEqual(list(rt.d1._dict), [3])
+
+        # saving copies the items not loaded yet without loading them
+        rt.d1[3].f = 30.0
+        stream = io.StringIO()
+        rt.saveToStream(stream)
+        self.assertEqual(list(rt.d1._dict), [3])
+        rt2 = Config4()
+        rt2.loadFromStream(stream.getvalue())
+        self.assertEqual(rt2.d1[3].f, 30.0)
+        self.assertEqual(rt2.d1[4].f, 4.0)
+
+        # frozen configs freeze items as they are loaded
+        rt.freeze()
+        self.assertRaises(pexConfig.FieldValidationError, setattr, rt.d1[1], "f", 0.0)
+
+        # pickling, modification and deletion work on items not loaded yet
+        rt3 = pickle.loads(pickle.dumps(rt2))
+        rt3.d1[0] = Config1(f=10)
+        del rt3.d1[1]
+        self.assertEqual(rt3.d1[0].f, 10.0)
+        self.assertNotIn(1, rt3.d1)
+        rt3.validate()
+        self.assertEqual(rt3.toDict()["d1"][3], {"f": 30.0})
+        self.assertEqual(rt3.d1._pending, {})
+
+    def testLazyThreads(self):
+        c = Config4()
+        for k in range(50):
+            c.d1[k] = Config1(f=k)
+        stream = io.StringIO()
+        c.saveToStream(stream)
+        rt = Config4()
+        rt.loadFromStream(stream.getvalue())
+        rt.freeze()
+
+        # frozen configs are read from several threads; each item is loaded once
+        start = threading.Event()
+        results = []
+        errors = []
+
+        def read():
+            start.wait()
+            try:
+                results.append([rt.d1[k] for k in range(50)])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        start.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        for items in results:
+            self.assertEqual([item.f for item in items], list(range(50)))
+            self.assertTrue(all(a is b for a, b in zip(items, results[0])))
+        self.assertEqual(rt.d1._pending, {})
+        self.assertEqual(len(rt.d1), 50)
+
     def testToDict(self):
         c = Config2(d1={"a": Config1(f=4), "b": Config1})
         dict_ = c.toDict()
@@ -49,6 +49,22 @@ class Config2(pexConf.Config):
     c2 = pexConf.ConfigurableField("c2", target=Target2, ConfigClass=Config1, default=Config1(f=3))
 
 
+class Config4(pexConf.Config):
+    g = pexConf.Field("g", dtype=int, default=7)
+    target = pexConf.Field("shadowed by ConfigurableInstance.target", dtype=int, default=0)
+
+
+def Target3(config):
+    return config.g
+
+
+applyCache = pexConf.ApplyCache(maxSize=2)
+
+
+class Config3(pexConf.Config):
+    c1 = pexConf.ConfigurableField("c1", target=Target1, applyCache=applyCache)
+
+
 class ConfigurableFieldTest(unittest.TestCase):
     def testConstructor(self):
         try:
@@ -132,6 +148,62 @@ class ConfigurableFieldTest(unittest.TestCase):
         self.assertEqual(c.c2.f, r.c2.f)
         self.assertEqual(c.c2.target, r.c2.target)
 
+    def testProxy(self):
+        c = Config2()
+        self.assertIsInstance(c.c1, pexConf.ConfigurableInstance)
+        self.assertIn("f", type(c.c1).__dict__)
+        self.assertEqual(c.c1.__doc__, "c1")
+        self.assertEqual(c.c1.f, 5)
+        c.c1.f = 6
+        self.assertEqual(c.c1.f, 6)
+        self.assertEqual(c.c1.value.f, 6)
+        self.assertEqual(c.c1.toDict(), {"f": 6})
+
+        c.c1.retarget(Target3, Config4)
+        self.assertEqual(c.c1.g, 7)
+        self.assertEqual(c.c1.target, Target3)
+        self.assertEqual(c.c1.value.target, 0)
+        self.assertRaises(AttributeError, getattr, c.c1, "f")
+        c.c1.g = 8
+        self.assertEqual(c.c1.apply(), 8)
+
+        c.c1.retarget(Target1)
+        self.assertEqual(c.c1.f, 5)
+        self.assertRaises(AttributeError, getattr, c.c1, "g")
+        self.assertIs(type(c.c1), type(Config2().c1))
+
+    def testApplyCache(self):
+        applyCache.clear()
+        c = Config3()
+        # unfrozen configs are never cached
+        self.assertIsNot(c.c1.apply(), c.c1.apply())
+        self.assertEqual(applyCache.stats()["size"], 0)
+        self.assertIsNone(c.c1.value._saved)
+
+        c.freeze()
+        t = c.c1.apply()
+        self.assertIs(c.c1.apply(), t)
+        # frozen configs are identified by their saved script, made only once
+        saved = c.c1.value._saved
+        self.assertIsNotNone(saved)
+        c.c1.apply()
+        self.assertIs(c.c1.value._saved, saved)
+        # a different config with the same content shares the cached configurable
+        c2 = Config3()
+        c2.freeze()
+        self.assertIs(c2.c1.apply(), t)
+        stats = applyCache.stats()
+        self.assertEqual((stats["hits"], stats["size"]), (3, 1))
+
+        for f in (1.0, 2.0):
+            c3 = Config3()
+            c3.c1.f = f
+            c3.freeze()
+            self.assertEqual(c3.c1.apply().f, f)
+        self.assertEqual(len(applyCache), 2)
+        self.assertEqual(applyCache.evictions, 1)
+        self.assertIsNot(c.c1.apply(), t)
+
 
 class TestMemory(lsst.utils.tests.MemoryTestCase):
     pass
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import object
+
+import gc
+import io
+import unittest
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+
+computed = []
+
+
+def kernelSize(config):
+    computed.append("kernelSize")
+    return 2*int(config.sigma*config.nSigma) + 1
+
+
+class PsfConfig(pexConfig.Config):
+    width = pexConfig.Field("width", float, default=2.0)
+
+
+class OtherPsfConfig(pexConfig.Config):
+    width = pexConfig.Field("width", float, default=5.0)
+
+
+class PsfTask(object):
+    ConfigClass = PsfConfig
+
+    def __init__(self, config):
+        pass
+
+
+class OtherPsfTask(object):
+    ConfigClass = OtherPsfConfig
+
+    def __init__(self, config):
+        pass
+
+
+class TaskConfig(pexConfig.Config):
+    task = pexConfig.ConfigurableField("task", target=PsfTask)
+    taskWidth = pexConfig.DerivedField("task width", inputs=["task.width"], compute=lambda c: c.task.width)
+
+
+class KernelConfig(pexConfig.Config):
+    sigma = pexConfig.Field("sigma", float, default=1.5)
+    nSigma = pexConfig.Field("nSigma", float, default=3.0)
+    steps = pexConfig.ListField("steps", int, default=[1, 2])
+    psf = pexConfig.ConfigField("psf", PsfConfig)
+    kernelSize = pexConfig.DerivedField("kernel size", inputs=["sigma", "nSigma"], compute=kernelSize)
+    nSteps = pexConfig.DerivedField("number of steps", inputs="steps", compute=lambda c: len(c.steps))
+    psfArea = pexConfig.DerivedField("psf area", inputs=["psf.width"], compute=lambda c: c.psf.width**2)
+
+
+class DerivedFieldTest(unittest.TestCase):
+
+    def setUp(self):
+        del computed[:]
+
+    def tearDown(self):
+        gc.collect()
+        self.assertEqual(pexConfig.Config._observerCount, 0)
+
+    def testCaching(self):
+        config = KernelConfig()
+        self.assertEqual(config.kernelSize, 9)
+        self.assertEqual(config.kernelSize, 9)
+        self.assertEqual(computed, ["kernelSize"])
+
+        config.steps.append(3)
+        config.psf.width = 1.0
+        self.assertEqual(config.kernelSize, 9)
+        self.assertEqual(computed, ["kernelSize"])
+
+        config.sigma = 2.0
+        self.assertEqual(config.kernelSize, 13)
+        config.update(nSigma=1.0)
+        self.assertEqual(config.kernelSize, 5)
+        config.loadFromStream("config.sigma = 1.0")
+        self.assertEqual(config.kernelSize, 3)
+        self.assertEqual(len(computed), 4)
+
+    def testInvalidation(self):
+        config = KernelConfig()
+        self.assertEqual(config.nSteps, 2)
+        self.assertEqual(config.psfArea, 4.0)
+        self.assertGreater(pexConfig.Config._observerCount, 0)
+        config.steps.append(3)
+        self.assertEqual(config.nSteps, 3)
+        config.steps = [1]
+        self.assertEqual(config.nSteps, 1)
+        config.psf = PsfConfig(width=3.0)
+        self.assertEqual(config.psfArea, 9.0)
+
+        # nothing is watched once nothing is cached
+        config.steps = []
+        config.psf.width = 1.0
+        self.assertEqual(pexConfig.Config._observerCount, 0)
+        self.assertEqual(config.psfArea, 1.0)
+        config.freeze()
+        self.assertEqual(config.nSteps, 0)
+
+    def testRetarget(self):
+        config = TaskConfig()
+        self.assertEqual(config.taskWidth, 2.0)
+        config.task.retarget(OtherPsfTask)
+        self.assertEqual(config.taskWidth, 5.0)
+        config.task.width = 6.0
+        self.assertEqual(config.taskWidth, 6.0)
+
+    def testReadOnly(self):
+        config = KernelConfig()
+        self.assertRaises(AttributeError, setattr, config, "kernelSize", 3)
+        self.assertRaises(AttributeError, delattr, config, "kernelSize")
+        self.assertIsInstance(KernelConfig.kernelSize, pexConfig.DerivedField)
+        self.assertNotIn("kernelSize", KernelConfig._fields)
+
+        stream = io.StringIO()
+        config.saveToStream(stream)
+        self.assertNotIn("kernelSize", stream.getvalue())
+        self.assertNotIn("kernelSize", config.toDict())
+
+    def testBadInputs(self):
+        self.assertRaises(ValueError, pexConfig.DerivedField, "doc", [], len)
+        self.assertRaises(ValueError, pexConfig.DerivedField, "doc", ["sigma"], None)
+
+        class BadConfig(pexConfig.Config):
+            value = pexConfig.DerivedField("doc", ["missing"], compute=lambda c: 1)
+
+        self.assertRaises(AttributeError, getattr, BadConfig(), "value")
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
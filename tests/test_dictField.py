@@ -106,6 +106,32 @@ class DictFieldTest(unittest.TestCase):
         c.d3[4] = 5
         self.assertEqual(c.d3, {4.: 5.})
 
+    def testUpdate(self):
+        c = Config1()
+        history = c.d1.history
+        self.assertEqual(len(history), 1)
+        c.d1.update({"a": 1, "b": 2}, c=3)
+        self.assertEqual(c.d1, {"hi": 4, "a": 1, "b": 2, "c": 3})
+        c.d1.update([("a", 5)])
+        self.assertEqual(c.d1["a"], 5)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history[-1][0], {"hi": 4, "a": 5, "b": 2, "c": 3})
+        self.assertEqual(history[-1][2], "update")
+
+        # a bad key or item rejects the whole update
+        self.assertRaises(pexConfig.FieldValidationError, c.d1.update, {"d": 1, "e": 0})
+        self.assertRaises(pexConfig.FieldValidationError, c.d1.update, {"d": 1, 2: 1})
+        self.assertNotIn("d", c.d1)
+        self.assertEqual(len(history), 3)
+
+        c.d3 = {}
+        c.d3.update({1: 2}, __label="batch")
+        self.assertEqual(c.d3, {1.: 2.})
+        self.assertEqual(c.d3.history[-1][2], "batch")
+
+        c.freeze()
+        self.assertRaises(pexConfig.FieldValidationError, c.d1.update, {"d": 1})
+
     def testNoArbitraryAttributes(self):
         c = Config1()
         self.assertRaises(pexConfig.FieldValidationError, setattr, c.d1, "should", "fail")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import os
+import subprocess
+import sys
+import unittest
+
+import lsst.utils.tests
+
+
+class ImportTest(unittest.TestCase):
+
+    def testNoHeavyImports(self):
+        """Importing lsst.pex.config must not import numpy, pex_policy or daf_base"""
+        script = ("import sys; import lsst.pex.config; "
+                  "print(','.join(m for m in ('numpy', 'lsst.pex.policy', 'lsst.daf.base') "
+                  "if m in sys.modules))")
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p)
+        output = subprocess.check_output([sys.executable, "-c", script], env=env)
+        self.assertEqual(output.decode().strip(), "")
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import io
+import json
+import unittest
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+
+
+class InnerConfig(pexConfig.Config):
+    x = pexConfig.Field("x", int, default=1, check=lambda x: x > 0)
+    l = pexConfig.ListField("l", int, default=[1, 2], itemCheck=lambda x: x > 0)  # noqa E741
+
+
+class OuterConfig(pexConfig.Config):
+    inner = pexConfig.ConfigField("inner", InnerConfig)
+    y = pexConfig.Field("y", float, default=1.0)
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def tearDown(self):
+        pexConfig.disableStats()
+        pexConfig.resetStats()
+
+    def testDisabled(self):
+        self.assertFalse(pexConfig.statsEnabled())
+        config = OuterConfig()
+        config.inner.x = 3
+        config.validate()
+        self.assertEqual(pexConfig.stats(), {})
+
+    def testStats(self):
+        pexConfig.enableStats()
+        self.assertTrue(pexConfig.statsEnabled())
+        config = OuterConfig()
+        config.inner.x = 3
+        config.inner.l.append(4)
+        config.validate()
+        stream = io.StringIO()
+        config.saveToStream(stream)
+        OuterConfig().loadFromStream(stream.getvalue())
+        pexConfig.disableStats()
+        config.inner.x = 4
+
+        stats = pexConfig.stats()
+        for operation in ("getCallStack", "validateValue", "check", "validate", "saveToStream",
+                          "loadFromStream"):
+            self.assertIn(operation, stats)
+            self.assertGreater(stats[operation]["count"], 0)
+            self.assertGreaterEqual(stats[operation]["time"], 0.0)
+        self.assertEqual(stats["validate"]["byKey"]["OuterConfig"]["count"], 1)
+        self.assertEqual(stats["validate"]["byKey"]["InnerConfig"]["count"], 1)
+        self.assertEqual(stats["saveToStream"]["byKey"]["OuterConfig"]["count"], 1)
+        self.assertEqual(stats["loadFromStream"]["byKey"]["OuterConfig"]["count"], 1)
+        # x is set to its default and then overridden, in each of the two configs
+        self.assertEqual(stats["validateValue"]["byKey"]["InnerConfig.x"]["count"], 4)
+        # checks are keyed like validation, whichever kind of field they belong to
+        self.assertEqual(stats["check"]["byKey"]["InnerConfig.x"]["count"], 4)
+        self.assertNotIn("x", stats["check"]["byKey"])
+        self.assertIn("InnerConfig.l", stats["check"]["byKey"])
+
+        pexConfig.resetStats()
+        self.assertEqual(pexConfig.stats(), {})
+
+    def testTracer(self):
+        config = OuterConfig()
+        override = ("try:\n    import _noSuchModuleForPexConfigTracing\nexcept ImportError:\n    pass\n"
+                    "config.inner.loadFromStream('config.x = 5')\n")
+        with pexConfig.Tracer() as tracer:
+            self.assertTrue(pexConfig.instrumentation.enabled)
+            self.assertFalse(pexConfig.statsEnabled())
+            config.loadFromStream(override)
+            config.validate()
+        self.assertFalse(pexConfig.instrumentation.enabled)
+        config.validate()
+        self.assertEqual(config.inner.x, 5)
+
+        trace = json.loads(json.dumps(tracer.toChromeTrace()))
+        names = [(event["ph"], event.get("name")) for event in trace["traceEvents"]]
+        self.assertEqual(names, [
+            ("B", "loadFromStream OuterConfig"),
+            ("i", "import _noSuchModuleForPexConfigTracing"),
+            ("B", "loadFromStream inner"),
+            ("E", None),
+            ("E", None),
+            ("B", "validate OuterConfig"),
+            ("B", "validate inner"),
+            ("E", None),
+            ("E", None),
+        ])
+        times = [event["ts"] for event in trace["traceEvents"]]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(trace["traceEvents"][2]["args"]["class"], __name__ + ".InnerConfig")
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
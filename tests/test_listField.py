@@ -146,6 +146,33 @@ class ListFieldTest(unittest.TestCase):
         c.ls.append("foo")
         self.assertEqual(c.ls, ["hi", "foo"])
 
+    def testBulkModification(self):
+        c = Config2()
+        history = c.history["lf"]
+        self.assertEqual(len(history), 1)
+
+        c.lf.extend([4, 5.5])
+        self.assertEqual(c.lf, [1., 2., 3., 4., 5.5])
+        self.assertIsInstance(c.lf[3], float)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history[-1][2], "extend")
+
+        values = [10, 11]
+        c.lf[1:3] = values
+        self.assertEqual(c.lf, [1., 10., 11., 4., 5.5])
+        self.assertEqual(values, [10, 11])
+        c.lf[::2] = [0., 0., 0.]
+        self.assertEqual(c.lf, [0., 10., 0., 4., 0.])
+        self.assertEqual(len(history), 4)
+
+        # a bad item rejects the whole batch
+        self.assertRaises(pexConfig.FieldValidationError, c.lf.extend, [7., "eight"])
+        c1 = Config1()
+        self.assertRaises(pexConfig.FieldValidationError, c1.l1.extend, [4, 0])
+        self.assertEqual(c.lf, [0., 10., 0., 4., 0.])
+        self.assertEqual(c1.l1, [1, 2, 3])
+        self.assertEqual(len(history), 4)
+
     def testNoArbitraryAttributes(self):
         c = Config1()
         self.assertRaises(pexConfig.FieldValidationError, setattr, c.l1, "should", "fail")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import object
+
+import gc
+import unittest
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+import lsst.pex.config.config
+
+
+class InnerConfig(pexConfig.Config):
+    x = pexConfig.Field("x", int, default=1)
+
+
+class OtherConfig(pexConfig.Config):
+    y = pexConfig.Field("y", float, default=0.5)
+
+
+class Target1(object):
+    ConfigClass = InnerConfig
+
+    def __init__(self, config):
+        pass
+
+
+class Target2(object):
+    ConfigClass = OtherConfig
+
+    def __init__(self, config):
+        pass
+
+
+class OuterConfig(pexConfig.Config):
+    a = pexConfig.Field("a", int, default=0)
+    values = pexConfig.ListField("values", int, default=[1])
+    d = pexConfig.DictField("d", keytype=str, itemtype=int, default={})
+    cd = pexConfig.ConfigDictField("cd", keytype=str, itemtype=InnerConfig, default={})
+    inner = pexConfig.ConfigField("inner", InnerConfig)
+    choice = pexConfig.ConfigChoiceField("choice", {"i": InnerConfig, "o": OtherConfig}, default="i")
+    multi = pexConfig.ConfigChoiceField("multi", {"i": InnerConfig, "o": OtherConfig}, multi=True)
+    target = pexConfig.ConfigurableField("target", target=Target1)
+
+
+class ObserverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = OuterConfig()
+        self.events = []
+        self.config.subscribe(self.record)
+
+    def tearDown(self):
+        if self.record in (self.config._observers or []):
+            self.config.unsubscribe(self.record)
+        self.assertEqual(pexConfig.Config._observerCount, 0)
+
+    def record(self, path, old, new, label):
+        self.events.append((path, old, new, label))
+
+    def testFields(self):
+        self.config.a = 3
+        self.config.inner.x = 4
+        self.config.choice["o"].y = 1.5
+        self.config.target.x = 5
+        self.assertEqual(self.events, [
+            ("a", 0, 3, "assignment"),
+            ("inner.x", 1, 4, "assignment"),
+            ("choice['o'].y", 0.5, 1.5, "assignment"),
+            ("target.x", 1, 5, "assignment"),
+        ])
+
+        # observers of a sub-config see paths relative to it
+        innerEvents = []
+        self.config.inner.subscribe(lambda *args: innerEvents.append(args))
+        self.config.inner.x = 6
+        self.assertEqual(innerEvents, [("x", 4, 6, "assignment")])
+        self.assertEqual(self.events[-1], ("inner.x", 4, 6, "assignment"))
+        self.config.inner.unsubscribe(self.config.inner._observers[0])
+
+    def testContainers(self):
+        self.config.values.append(2)
+        self.config.values = [5]
+        self.config.d["k"] = 1
+        del self.config.d["k"]
+        self.config.cd["k"] = InnerConfig
+        item = self.config.cd["k"]
+        item.x = 2
+        del self.config.cd["k"]
+        self.assertEqual(self.events, [
+            ("values", [1], [1, 2], "insert"),
+            ("values", [1, 2], [5], "assignment"),
+            ("d['k']", None, 1, "setitem"),
+            ("d['k']", 1, None, "delitem"),
+            ("cd['k']", None, item, "setitem"),
+            ("cd['k'].x", 1, 2, "assignment"),
+            ("cd['k']", item, None, "delitem"),
+        ])
+
+    def testSelections(self):
+        self.config.choice = "o"
+        self.config.multi = ["i"]
+        self.config.multi.names.add("o")
+        self.config.multi.names.discard("i")
+        self.events = [(path, sorted(old) if isinstance(old, list) else old,
+                        sorted(new) if isinstance(new, list) else new, label)
+                       for path, old, new, label in self.events]
+        self.assertEqual(self.events, [
+            ("choice.name", "i", "o", "assignment"),
+            ("multi.names", None, ["i"], "assignment"),
+            ("multi.names", ["i"], ["i", "o"], "selection"),
+            ("multi.names", ["i", "o"], ["o"], "selection"),
+        ])
+
+    def testRetarget(self):
+        self.config.target.retarget(Target2)
+        self.config.target.y = 2.0
+        self.assertEqual(self.events, [
+            ("target.target", Target1, Target2, "retarget"),
+            ("target.y", 0.5, 2.0, "assignment"),
+        ])
+
+    def testUnsubscribe(self):
+        self.config.unsubscribe(self.record)
+        self.assertRaises(ValueError, self.config.unsubscribe, self.record)
+        self.config.a = 3
+        self.assertEqual(self.events, [])
+
+    def testDeletedConfig(self):
+        config = OuterConfig()
+        config.subscribe(self.record)
+        config.inner.subscribe(self.record)
+        self.assertEqual(pexConfig.Config._observerCount, 3)
+        del config
+        gc.collect()
+        self.assertEqual(pexConfig.Config._observerCount, 1)
+
+    def testUnrelatedConfig(self):
+        # changes to configs outside an observed tree are not reported
+        other = OuterConfig()
+        self.assertFalse(lsst.pex.config.config._isObserved(other))
+        self.assertFalse(lsst.pex.config.config._isObserved(other.inner))
+        self.assertTrue(lsst.pex.config.config._isObserved(self.config.inner))
+        other.values.append(2)
+        other.inner.x = 2
+        self.assertEqual(self.events, [])
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -24,6 +24,7 @@
 from builtins import object
 
 import unittest
+import concurrent.futures
 import lsst.utils.tests
 import lsst.pex.config as pexConfig
 
@@ -127,6 +128,70 @@ class ConfigTest(unittest.TestCase):
         c.r = "foo2"
         c.r.apply()
 
+    def testApplyMulti(self):
+        class C1(pexConfig.Config):
+            r = self.registry.makeField("registry field", multi=True, default=["foo1", "foo2", "foo21"])
+        c = C1()
+        expected = [type(x) for x in c.r.apply()]
+        self.assertEqual(len(expected), 3)
+
+        timings = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
+            results = c.r.applyConcurrently(executor, timer=lambda name, dt: timings.append((name, dt)))
+        self.assertEqual([type(x) for x in results], expected)
+        for result, name in zip(results, c.r.names):
+            self.assertIs(result.config, c.r[name])
+        self.assertEqual(sorted(name for name, dt in timings), ["foo1", "foo2", "foo21"])
+        for name, dt in timings:
+            self.assertGreaterEqual(dt, 0.0)
+
+        c.r = None
+        self.assertRaises(pexConfig.FieldValidationError, c.r.applyConcurrently, executor)
+
+    def testApplyKeywords(self):
+        # apply passes all arguments on to the targets
+        class Target(object):
+            ConfigClass = self.fooConfig1Class
+
+            def __init__(self, value=None, config=None, executor=None, timer=None):
+                self.value = value
+                self.executor = executor
+                self.timer = timer
+
+        self.registry.register("kw", Target)
+
+        class C1(pexConfig.Config):
+            r = self.registry.makeField("registry field", default="kw")
+        c = C1()
+        result = c.r.apply(executor="e", timer="t")
+        self.assertEqual((result.executor, result.timer), ("e", "t"))
+        timings = []
+        result = c.r.applyConcurrently(None, kw=dict(executor="e", timer="t"),
+                                       timer=lambda name, dt: timings.append(name))
+        self.assertEqual((result.executor, result.timer), ("e", "t"))
+        self.assertEqual(timings, ["kw"])
+
+        # positional arguments are passed on too, with or without a timer
+        self.assertEqual(c.r.apply(3).value, 3)
+        result = c.r.applyConcurrently(None, (4,))
+        self.assertEqual((result.value, result.executor, result.timer), (4, None, None))
+        result = c.r.applyConcurrently(None, [5], timer=lambda name, dt: timings.append(name))
+        self.assertEqual(result.value, 5)
+        self.assertEqual(timings, ["kw", "kw"])
+
+    def testApplyCache(self):
+        applyCache = pexConfig.ApplyCache()
+
+        class C1(pexConfig.Config):
+            r = self.registry.makeField("registry field", multi=True, default=["foo1", "foo2"],
+                                        applyCache=applyCache)
+        c = C1()
+        c.freeze()
+        results = c.r.apply()
+        self.assertEqual(c.r.apply(), results)
+        self.assertEqual(applyCache.hits, 2)
+        self.assertEqual(applyCache.misses, 2)
+
     def testExceptions(self):
         class C1(pexConfig.Config):
             r = self.registry.makeField("registry field", multi=True, default=[])
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+import multiprocessing
+import os
+import pickle
+import unittest
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+import lsst.pex.config.sharedConfig
+
+
+class InnerConfig(pexConfig.Config):
+    f = pexConfig.Field("f", float, default=1.0)
+
+
+class SharedTestConfig(pexConfig.Config):
+    x = pexConfig.Field("x", int, default=5)
+    values = pexConfig.ListField("values", int, default=[1, 2, 3])
+    inner = pexConfig.ConfigField("inner", InnerConfig)
+
+
+def readShared(args):
+    """Process pool task: read the published config, reporting how many
+    configs this worker has loaded"""
+    handle, index = args
+    snap = handle.attach()
+    return (os.getpid(), snap.x + index, snap.values, snap.inner.f,
+            len(lsst.pex.config.sharedConfig._attached))
+
+
+class SharedConfigTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = SharedTestConfig()
+        self.config.inner.f = 2.5
+        self.config.freeze()
+
+    def testNotFrozen(self):
+        self.assertRaises(ValueError, pexConfig.publishConfig, SharedTestConfig())
+
+    def testAttach(self):
+        with pexConfig.publishConfig(self.config) as handle:
+            self.assertTrue(os.path.exists(handle.path))
+            self.assertEqual(handle.attach(), self.config.snapshot())
+
+            # as seen from another process
+            other = pickle.loads(pickle.dumps(handle))
+            other.detach()
+            snap = other.attach()
+            self.assertEqual(snap, self.config.snapshot())
+            self.assertIs(other.attach(), snap)
+        self.assertFalse(os.path.exists(handle.path))
+
+    def testReusedPath(self):
+        # as seen from a worker, which still holds the snapshot of an earlier
+        # publication when a new one is made at the same path
+        first = pexConfig.publishConfig(self.config)
+        self.assertEqual(first.attach().x, 5)
+        os.remove(first.path)
+        other = SharedTestConfig(x=7)
+        other.freeze()
+        with pexConfig.publishConfig(other, dir=os.path.dirname(first.path)) as second:
+            os.rename(second.path, first.path)
+            second.path = first.path
+            second.detach()
+            self.assertEqual(second.attach().x, 7)
+        first.detach()
+
+    def testBounded(self):
+        # a worker is never told when a config is unlinked, so it keeps only
+        # the most recently attached snapshots
+        sharedConfig = lsst.pex.config.sharedConfig
+        maxAttached = sharedConfig._maxAttached
+        sharedConfig._maxAttached = 2
+        handles = []
+        try:
+            for x in range(3):
+                config = SharedTestConfig(x=x)
+                config.freeze()
+                handles.append(pexConfig.publishConfig(config))
+            self.assertNotIn(handles[0].token, sharedConfig._attached)
+            self.assertEqual(list(sharedConfig._attached), [h.token for h in handles[1:]])
+            # a dropped snapshot is read again from its file
+            self.assertEqual(handles[0].attach().x, 0)
+            self.assertEqual(list(sharedConfig._attached), [h.token for h in (handles[2], handles[0])])
+            snap = handles[2].attach()
+            self.assertEqual(list(sharedConfig._attached), [h.token for h in (handles[0], handles[2])])
+            self.assertIs(handles[2].attach(), snap)
+        finally:
+            sharedConfig._maxAttached = maxAttached
+            for handle in handles:
+                handle.unlink()
+        self.assertEqual([h.token for h in handles if h.token in sharedConfig._attached], [])
+
+    def testProcessPool(self):
+        # start the workers first, so they do not inherit the publisher's copy
+        pool = multiprocessing.Pool(2)
+        try:
+            with pexConfig.publishConfig(self.config) as handle:
+                results = pool.map(readShared, [(handle, i) for i in range(20)], chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual([r[1] for r in results], [5 + i for i in range(20)])
+        for pid, x, values, f, numAttached in results:
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(values, (1, 2, 3))
+            self.assertEqual(f, 2.5)
+            # each worker loads the config once, however many tasks it runs
+            self.assertEqual(numAttached, 1)
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#
+# LSST Data Management System
+# Copyright 2017 LSST Corporation.
+#
+# This product includes software developed by the
+# LSST Project (http://www.lsst.org/).
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the LSST License Statement and
+# the GNU General Public License along with this program.  If not,
+# see <http://www.lsstcorp.org/LegalNotices/>.
+#
+from builtins import object
+
+import pickle
+import unittest
+
+import lsst.utils.tests
+import lsst.pex.config as pexConfig
+
+
+class InnerConfig(pexConfig.Config):
+    f = pexConfig.Field("f", float, default=1.0)
+    names = pexConfig.ListField("names", str, default=["a", "b"])
+
+
+class OtherConfig(pexConfig.Config):
+    i = pexConfig.Field("i", int, default=3)
+
+
+class Target(object):
+    ConfigClass = InnerConfig
+
+    def __init__(self, config):
+        self.config = config
+
+
+class OuterConfig(pexConfig.Config):
+    x = pexConfig.Field("x", int, default=5)
+    opt = pexConfig.Field("optional", int, default=None, optional=True)
+    values = pexConfig.ListField("values", int, default=[1, 2, 3])
+    mapping = pexConfig.DictField("mapping", str, float, default={"a": 1.0})
+    inner = pexConfig.ConfigField("inner", InnerConfig)
+    choice = pexConfig.ConfigChoiceField("choice", typemap={"inner": InnerConfig, "other": OtherConfig},
+                                         default="other")
+    multi = pexConfig.ConfigChoiceField("multi", typemap={"inner": InnerConfig, "other": OtherConfig},
+                                        multi=True)
+    configs = pexConfig.ConfigDictField("configs", str, InnerConfig, default={})
+    target = pexConfig.ConfigurableField("target", target=Target)
+
+
+class SnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.config = OuterConfig()
+        self.config.inner.names.append("c")
+        self.config.multi.names = ["inner", "other"]
+        self.config.configs = {"k": InnerConfig(f=2.0)}
+        self.config.target.f = 4.0
+
+    def testValues(self):
+        snap = self.config.snapshot()
+        self.assertIsInstance(snap, tuple)
+        self.assertEqual(snap.x, 5)
+        self.assertIsNone(snap.opt)
+        self.assertEqual(snap.values, (1, 2, 3))
+        self.assertIsInstance(snap.mapping, pexConfig.FrozenDict)
+        self.assertEqual(snap.mapping, {"a": 1.0})
+        self.assertEqual(snap.inner.f, 1.0)
+        self.assertEqual(snap.inner.names, ("a", "b", "c"))
+        self.assertEqual(snap.choice.name, "other")
+        self.assertEqual(snap.choice.active.i, 3)
+        self.assertEqual(snap.choice["inner"].f, 1.0)
+        self.assertEqual(snap.multi.names, frozenset(["inner", "other"]))
+        self.assertEqual([a.__class__.__name__ for a in snap.multi.active],
+                         ["InnerConfigSnapshot", "OtherConfigSnapshot"])
+        self.assertEqual(snap.configs["k"].f, 2.0)
+        self.assertEqual(snap.target.f, 4.0)
+        self.assertEqual(snap._asdict()["x"], 5)
+
+        # the snapshot does not follow the config
+        self.config.x = 6
+        self.config.inner.names.append("d")
+        self.assertEqual(snap.x, 5)
+        self.assertEqual(snap.inner.names, ("a", "b", "c"))
+
+    def testImmutable(self):
+        snap = self.config.snapshot()
+        self.assertRaises(AttributeError, setattr, snap, "x", 6)
+        self.assertRaises(AttributeError, setattr, snap.inner, "f", 2.0)
+        with self.assertRaises(TypeError):
+            snap.mapping["b"] = 2.0
+        self.assertRaises(AttributeError, setattr, snap.mapping, "_dict", {})
+        self.assertRaises(AttributeError, setattr, snap.choice, "name", "inner")
+
+    def testHashAndEquality(self):
+        self.config.freeze()
+        snap = self.config.snapshot()
+        other = OuterConfig()
+        other.inner.names.append("c")
+        other.multi.names = ["other", "inner"]
+        other.configs = {"k": InnerConfig(f=2.0)}
+        other.target.f = 4.0
+        self.assertEqual(snap, other.snapshot())
+        self.assertEqual(hash(snap), hash(other.snapshot()))
+        self.assertEqual(len(set([snap, other.snapshot()])), 1)
+
+        other.mapping["b"] = 2.0
+        self.assertNotEqual(snap, other.snapshot())
+        del other.mapping["b"]
+        self.assertEqual(snap, other.snapshot())
+        other.choice.name = "inner"
+        self.assertNotEqual(snap, other.snapshot())
+
+    def testPickle(self):
+        snap = self.config.snapshot()
+        self.assertEqual(pickle.loads(pickle.dumps(snap)), snap)
+
+    def testNewField(self):
+        class AddedConfig(pexConfig.Config):
+            a = pexConfig.Field("a", int, default=1)
+
+        self.assertEqual(AddedConfig().snapshot(), (1,))
+        AddedConfig.b = pexConfig.Field("b", int, default=2)
+        self.assertEqual(AddedConfig().snapshot().b, 2)
+
+
+class TestMemory(lsst.utils.tests.MemoryTestCase):
+    pass
+
+
+def setup_module(module):
+    lsst.utils.tests.init()
+
+
+if __name__ == "__main__":
+    lsst.utils.tests.init()
+    unittest.main()
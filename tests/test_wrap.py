@@ -23,6 +23,7 @@
 #
 import unittest
 import lsst.utils.tests
+import lsst.pex.config
 
 import testLib
 import pickle
@@ -53,6 +54,17 @@ class WrapTest(unittest.TestCase):
         control = testLib.ControlObject()
         self.assertTrue(testLib.checkControl(control, config.foo, config.bar.list()))
 
+    def testDefaultsCached(self):
+        """Test that the cached Control defaults are not shared between Config objects."""
+        config1 = testLib.ConfigObject()
+        config1.bar.append("zot")
+        config1.foo = 5
+        config2 = testLib.ConfigObject()
+        self.assertEqual(config2.foo, 1)
+        self.assertEqual(list(config2.bar), [])
+        self.assertEqual(testLib.ConfigObject._readControlValues(testLib.ControlObject()),
+                         {"foo": 1, "bar": []})
+
     def testPickle(self):
         """Test that C++ Control object pickles correctly"""
         config = testLib.ConfigObject()
@@ -89,6 +101,57 @@ class NestedWrapTest(unittest.TestCase):
         control = testLib.OuterControlObject()
         self.assertTrue(testLib.checkNestedControl(control, config.a.p, config.a.q, config.b))
 
+    def testReadControlValues(self):
+        """Test extracting the values of a nested Control object."""
+        control = testLib.OuterControlObject()
+        control.a.p = 6.0
+        control.b = 3
+        values = testLib.OuterConfigObject._readControlValues(control)
+        self.assertEqual(values, {"a": {"p": 6.0, "q": control.a.q}, "b": 3})
+        config = testLib.OuterConfigObject()
+        config.readControl(control)
+        self.assertEqual(config.toDict(), values)
+
+    def testMakeControls(self):
+        """Test making a batch of C++ Control objects, sharing identical frozen sub-configs."""
+        configs = []
+        for b in range(4):
+            config = testLib.OuterConfigObject()
+            config.a.p = 5.0 if b < 3 else 6.0
+            config.b = b
+            config.freeze()
+            configs.append(config)
+
+        innerCalls = []
+        makeInner = testLib.InnerConfigObject.makeControl
+
+        def countingMakeControl(self, _memo=None):
+            innerCalls.append(self)
+            return makeInner(self, _memo)
+        testLib.InnerConfigObject.makeControl = countingMakeControl
+        try:
+            controls = lsst.pex.config.makeControls(configs)
+        finally:
+            testLib.InnerConfigObject.makeControl = makeInner
+        self.assertEqual(len(innerCalls), 2)
+        self.assertEqual(len(controls), len(configs))
+        for config, control in zip(configs, controls):
+            self.assertTrue(testLib.checkNestedControl(control, config.a.p, config.a.q, config.b))
+
+    def testReadControls(self):
+        """Test reading a batch of C++ Control objects into Config objects."""
+        controls = []
+        for b in range(3):
+            control = testLib.OuterControlObject()
+            control.a.p = float(b)
+            control.b = b
+            controls.append(control)
+        configs = lsst.pex.config.readControls(controls)
+        for config, control in zip(configs, controls):
+            self.assertIsInstance(config, testLib.OuterConfigObject)
+            self.assertTrue(testLib.checkNestedControl(control, config.a.p, config.a.q, config.b))
+        self.assertEqual(config.history["b"][-1][2], "readControls")
+
     def testInt64(self):
         """Test that we can wrap C++ Control objects with int64 members."""
         config = testLib.OuterConfigObject()